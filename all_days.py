@@ -1,25 +1,555 @@
 # vi: set shiftwidth=4 tabstop=4 expandtab:
+import argparse
+import collections
+import concurrent.futures
+import contextlib
+import importlib
+import io
+import json
+import os
+import subprocess
+import sys
+import time
+
+import backends
+import cpu_profile
+import golden_answers
+import memory_profile
+import parse_cache
+import path_search
+import solution_cache
 
 nb_days = 25
-days = [__import__("day%d" % i) for i in range(1, nb_days + 1)]
+all_days = list(range(1, nb_days + 1))
+
+
+def parse_days(specs):
+    # "15", "19-22" -> [15, 19, 20, 21, 22]
+    days = []
+    for spec in specs:
+        first, sep, last = spec.partition("-")
+        first = int(first)
+        last = int(last) if sep else first
+        if not 1 <= first <= last <= nb_days:
+            raise ValueError("Invalid day specification: %s" % spec)
+        days.extend(d for d in range(first, last + 1) if d not in days)
+    return days
+
+
+def get_day_name(day_num):
+    return "day%d" % day_num
+
 
+def import_day(day_num):
+    # Modules are only imported when needed, time spent is reported separately
+    name = get_day_name(day_num)
+    begin = time.perf_counter()
+    day = importlib.import_module(name)
+    return day, time.perf_counter() - begin
 
-def run_tests():
+
+def run_tests(days=all_days, search_stats=None):
     print("Unit-tests")
-    for day in days:
-        print("-", day.__name__)
-        day.run_tests()
+    for day_num in days:
+        day, import_time = import_day(day_num)
+        print("- %s (import: %.3fs)" % (day.__name__, import_time))
+        with count_search_stats(day.__name__, search_stats):
+            day.run_tests()
     print()
 
 
-def get_solutions():
+def run_solutions(day, memoize=False, force=False):
+    # Returns whether the solutions were served from the cache
+    if memoize:
+        return solution_cache.get_solutions(day, force)
+    day.get_solutions()
+    return False
+
+
+def get_solutions(days=all_days, memoize=False, force=False, search_stats=None):
     print("Actual solutions")
-    for day in days:
-        print("-", day.__name__)
-        day.get_solutions()
+    from_cache = []
+    for day_num in days:
+        day, import_time = import_day(day_num)
+        print("- %s (import: %.3fs)" % (day.__name__, import_time))
+        with count_search_stats(day.__name__, search_stats):
+            if run_solutions(day, memoize, force):
+                from_cache.append(day.__name__)
+    if memoize:
+        print_solution_cache_report(from_cache)
+    print()
+
+
+@contextlib.contextmanager
+def count_search_stats(name, search_stats):
+    # Path search counters of a day are added to search_stats[name]
+    before = path_search.stats.copy()
+    try:
+        yield
+    finally:
+        if search_stats is not None:
+            stats = path_search.stats - before
+            if stats:
+                search_stats.setdefault(name, collections.Counter()).update(stats)
+
+
+repo_dir = os.path.dirname(os.path.abspath(__file__))
+budgets_file = os.path.join(repo_dir, "time_budgets.json")
+
+
+def get_time_budgets(file_path=budgets_file):
+    # Maximum wall time in seconds for each day, "default" for unlisted days
+    with open(file_path) as f:
+        return json.load(f)
+
+
+def get_time_budget(budgets, day_num):
+    name = get_day_name(day_num)
+    return budgets.get(name, budgets["default"])
+
+
+DayResult = collections.namedtuple(
+    "DayResult",
+    [
+        "name",
+        "output",
+        "import_time",
+        "wall",
+        "cpu",
+        "parse_cache_stats",
+        "path_search_stats",
+        "solutions_from_cache",
+    ],
+)
+
+
+def run_day(day_num, tests=True, solutions=True, memoize=False, force=False):
+    # Run in a worker process: output is captured to be printed in day order
+    day, import_time = import_day(day_num)
+    cache_stats = parse_cache.stats.copy()
+    search_stats = path_search.stats.copy()
+    output = io.StringIO()
+    from_cache = False
+    wall, cpu = time.perf_counter(), time.process_time()
+    with contextlib.redirect_stdout(output):
+        if tests:
+            day.run_tests()
+        if solutions:
+            from_cache = run_solutions(day, memoize, force)
+    wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+    cache_stats = parse_cache.stats - cache_stats
+    search_stats = path_search.stats - search_stats
+    return DayResult(
+        day.__name__,
+        output.getvalue(),
+        import_time,
+        wall,
+        cpu,
+        cache_stats,
+        search_stats,
+        from_cache,
+    )
+
+
+def run_day_in_subprocess(day_num, budget, tests, solutions, memoize, force):
+    # Isolated in a subprocess so that it can be killed when over budget
+    # Returns (status, result or error message)
+    cmd = [sys.executable, os.path.abspath(__file__), "--worker", str(day_num)]
+    cmd.extend(
+        flag
+        for flag, enabled in [
+            ("--tests", tests),
+            ("--solutions", solutions),
+            ("--memoize", memoize),
+            ("--force", force),
+        ]
+        if enabled
+    )
+    try:
+        proc = subprocess.run(cmd, capture_output=True, text=True, timeout=budget)
+    except subprocess.TimeoutExpired:
+        return "TIMEOUT", None
+    if proc.returncode != 0:
+        return "FAILED", proc.stderr
+    res = json.loads(proc.stdout)
+    res["parse_cache_stats"] = collections.Counter(res["parse_cache_stats"])
+    res["path_search_stats"] = collections.Counter(res["path_search_stats"])
+    return "OK", DayResult(**res)
+
+
+def run_days_in_subprocesses(days, day_budgets, jobs, tests, solutions, memoize, force):
+    # Yields (day_num, status, result) in the order of the days
+    # Slowest days are submitted first so that they do not end up running alone at the end
+    submit_order = sorted(days, key=lambda d: day_budgets[d], reverse=True)
+    with concurrent.futures.ThreadPoolExecutor(jobs or os.cpu_count()) as executor:
+        futures = {
+            day_num: executor.submit(
+                run_day_in_subprocess,
+                day_num,
+                day_budgets[day_num],
+                tests,
+                solutions,
+                memoize,
+                force,
+            )
+            for day_num in submit_order
+        }
+        for day_num in days:
+            yield (day_num, *futures[day_num].result())
+
+
+def run_worker(day_num, tests, solutions, memoize, force):
+    res = run_day(day_num, tests, solutions, memoize, force)
+    print(json.dumps(res._asdict()))
+
+
+def run_parallel(
+    days=all_days,
+    tests=True,
+    solutions=True,
+    memoize=False,
+    force=False,
+    jobs=None,
+    budgets=None,
+    timeout=None,
+):
+    # Returns the names of the days which did not complete
+    # With a single job, days run one after the other (still in subprocesses
+    # so that the time budgets are enforced)
+    if tests and solutions:
+        header = "Unit-tests and actual solutions"
+    else:
+        header = "Unit-tests" if tests else "Actual solutions"
+    print(header + (" (parallel)" if jobs != 1 else ""))
+    begin = time.perf_counter()
+    budgets = budgets or get_time_budgets()
+    day_budgets = {d: timeout or get_time_budget(budgets, d) for d in days}
+    cache_stats = collections.Counter()
+    search_stats = dict()
+    from_cache = []
+    failed = []
+    for day_num, status, res in run_days_in_subprocesses(
+        days, day_budgets, jobs, tests, solutions, memoize, force
+    ):
+        name, budget = get_day_name(day_num), day_budgets[day_num]
+        if status == "TIMEOUT":
+            print("- %s TIMEOUT (budget: %.1fs)" % (name, budget))
+            failed.append(name)
+        elif status == "FAILED":
+            print("- %s FAILED" % name)
+            print(res, end="")
+            failed.append(name)
+        else:
+            print(
+                "- %s (import: %.3fs, wall: %.3fs, cpu: %.3fs, budget: %.0f%% of %.1fs)"
+                % (
+                    res.name,
+                    res.import_time,
+                    res.wall,
+                    res.cpu,
+                    100 * res.wall / budget,
+                    budget,
+                )
+            )
+            print(res.output, end="")
+            cache_stats += res.parse_cache_stats
+            if res.path_search_stats:
+                search_stats[res.name] = res.path_search_stats
+            if res.solutions_from_cache:
+                from_cache.append(res.name)
+    print("Total wall time: %.3fs" % (time.perf_counter() - begin))
+    if failed:
+        print("Days not completed: %s" % ", ".join(failed))
+    if parse_cache.enabled:
+        print_parse_cache_stats(cache_stats)
+    print_path_search_stats(search_stats)
+    if memoize and solutions:
+        print_solution_cache_report(from_cache)
+    print()
+    return failed
+
+
+def run_golden(days=all_days, record=False, jobs=None, budgets=None, timeout=None):
+    # Actual solutions computed in parallel (never replayed from the solution
+    # cache) and either recorded as golden answers or compared to them
+    # Returns the names of the days which did not match
+    print("%s golden answers" % ("Recording" if record else "Verifying against"))
+    begin = time.perf_counter()
+    budgets = budgets or get_time_budgets()
+    day_budgets = {d: timeout or get_time_budget(budgets, d) for d in days}
+    golden = golden_answers.load()
+    answers = dict()
+    failed = []
+    for day_num, status, res in run_days_in_subprocesses(
+        days, day_budgets, jobs, False, True, False, False
+    ):
+        name, budget = get_day_name(day_num), day_budgets[day_num]
+        if status == "TIMEOUT":
+            print("- %s TIMEOUT (budget: %.1fs)" % (name, budget))
+            failed.append(name)
+            continue
+        if status == "FAILED":
+            print("- %s FAILED" % name)
+            print(res, end="")
+            failed.append(name)
+            continue
+        lines = res.output.splitlines()
+        if record:
+            answers[name] = lines
+            print("- %s recorded (wall: %.3fs)" % (name, res.wall))
+        elif name not in golden:
+            print("- %s MISSING (no golden answer)" % name)
+            failed.append(name)
+        else:
+            diff = golden_answers.get_diff(name, golden[name], lines)
+            if diff:
+                print("- %s MISMATCH (wall: %.3fs)" % (name, res.wall))
+                print("\n".join(diff))
+                failed.append(name)
+            else:
+                print("- %s OK (wall: %.3fs)" % (name, res.wall))
+    if record:
+        golden_answers.store(answers)
+    print("Total wall time: %.3fs" % (time.perf_counter() - begin))
+    if failed:
+        print(
+            "Days not %s: %s"
+            % ("recorded" if record else "matching", ", ".join(failed))
+        )
+    print()
+    return failed
+
+
+def map_days(func, days, jobs=None, *args):
+    # Call func(day_num, *args) for each day, in a process pool if jobs is
+    # not None, and yield the results in day order
+    if jobs is None:
+        for day_num in days:
+            yield func(day_num, *args)
+    else:
+        with concurrent.futures.ProcessPoolExecutor(jobs or None) as executor:
+            futures = [executor.submit(func, day_num, *args) for day_num in days]
+            for future in futures:
+                yield future.result()
+
+
+def run_memory_profile(days=all_days, jobs=None, nb_sites=5, json_path=None):
+    print("Memory profile")
+    report = dict()
+    for day_report in map_days(memory_profile.profile_day, days, jobs, nb_sites):
+        report.update(day_report)
+    memory_profile.print_report(report, nb_sites)
+    if json_path:
+        memory_profile.write_report(report, json_path)
     print()
 
 
+def run_cpu_profile(
+    days=all_days, jobs=None, prof_dir="profiles", top=20, functions=None
+):
+    print("CPU profile")
+    if functions:
+        for function_name in functions:
+            day_num, func_name = cpu_profile.split_function_name(function_name)
+            print(cpu_profile.profile_day(day_num, prof_dir, top, func_name))
+    else:
+        for report in map_days(cpu_profile.profile_day, days, jobs, prof_dir, top):
+            print(report)
+
+
+def print_parse_cache_stats(stats):
+    print(
+        "Parse cache: %d hit(s), %d miss(es), %d eviction(s)"
+        % (stats["hit"], stats["miss"], stats["evicted"])
+    )
+
+
+def print_path_search_stats(search_stats):
+    # Nodes expanded and pushed by the searches of path_search.py, per day
+    if search_stats:
+        print(
+            "Path search: %s"
+            % ", ".join(
+                "%s %d expanded / %d pushed"
+                % (name, stats["expanded"], stats["pushed"])
+                for name, stats in search_stats.items()
+            )
+        )
+
+
+def print_solution_cache_report(from_cache):
+    print("Solutions served from cache: %s" % (", ".join(from_cache) or "none"))
+
+
+def get_args():
+    parser = argparse.ArgumentParser(description="Run every day of Advent Of Code 2021")
+    parser.add_argument(
+        "days",
+        nargs="*",
+        default=[],
+        help="days to run, e.g. '15' or '19-22' (all by default)",
+    )
+    parser.add_argument(
+        "-t", "--tests", action="store_true", help="only run the unit-tests"
+    )
+    parser.add_argument(
+        "-s", "--solutions", action="store_true", help="only get the actual solutions"
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        nargs="?",
+        type=int,
+        const=0,
+        default=None,
+        help="run days in JOBS parallel subprocesses (all cores if no value is given) "
+        "instead of one after the other; in both cases, each day runs in a "
+        "subprocess killed when over its time budget",
+    )
+    parser.add_argument(
+        "--in-process",
+        action="store_true",
+        help="run the days one after the other in this process, without time "
+        "budgets (e.g. for debugging)",
+    )
+    parser.add_argument(
+        "--parse-cache",
+        action="store_true",
+        help="cache parsed inputs on disk (see parse_cache.py)",
+    )
+    parser.add_argument(
+        "-m",
+        "--memoize",
+        action="store_true",
+        help="replay solutions of days whose code and input did not change",
+    )
+    parser.add_argument(
+        "-f",
+        "--force",
+        action="store_true",
+        help="with --memoize: recompute (and store) every solution",
+    )
+    parser.add_argument(
+        "--memory",
+        action="store_true",
+        help="report peak memory, net allocations and top allocation sites of each "
+        "day and solver function instead of running the days normally",
+    )
+    parser.add_argument(
+        "--memory-sites",
+        type=int,
+        default=5,
+        help="number of allocation sites to report (default: 5)",
+    )
+    parser.add_argument("--memory-json", help="write the memory report to a JSON file")
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="profile get_solutions() of each day with cProfile instead of running "
+        "the days normally",
+    )
+    parser.add_argument(
+        "--profile-function",
+        action="append",
+        help="only profile the given function, e.g. 'day23.get_moves' (implies --profile)",
+    )
+    parser.add_argument(
+        "--profile-dir",
+        default="profiles",
+        help="directory for the .prof files (default: profiles)",
+    )
+    parser.add_argument(
+        "--profile-top",
+        type=int,
+        default=20,
+        help="number of functions to show, by cumulative time (default: 20)",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        help="time budget in seconds for every day, instead of the per-day budgets "
+        "from time_budgets.json (not with --in-process, --memory or --profile)",
+    )
+    parser.add_argument(
+        "--record-golden",
+        action="store_true",
+        help="run the actual solutions in parallel and store the answers in "
+        "golden_answers.json",
+    )
+    parser.add_argument(
+        "--verify",
+        action="store_true",
+        help="run the actual solutions in parallel and compare the answers to "
+        "golden_answers.json",
+    )
+    parser.add_argument(
+        "--backend",
+        help="backend for the days which have several implementations "
+        "(see backends.py), e.g. 'numpy'",
+    )
+    parser.add_argument("--worker", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    try:
+        args.days = parse_days(args.days) if args.days else all_days
+        if args.backend is not None:
+            backends.check(args.backend)
+        for function_name in args.profile_function or []:
+            cpu_profile.split_function_name(function_name)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.profile_function:
+        args.profile = True
+    if args.timeout is not None and (args.in_process or args.memory or args.profile):
+        parser.error(
+            "--timeout cannot be used with --in-process, --memory or --profile"
+        )
+    if args.in_process and args.jobs is not None:
+        parser.error("--in-process cannot be used with --jobs")
+    if not args.tests and not args.solutions:
+        args.tests = args.solutions = True
+    return args
+
+
 if __name__ == "__main__":
-    run_tests()
-    get_solutions()
+    args = get_args()
+    if args.parse_cache:
+        parse_cache.enable()
+    if args.backend is not None:
+        backends.select(args.backend)
+    if args.worker is not None:
+        run_worker(args.worker, args.tests, args.solutions, args.memoize, args.force)
+    elif args.record_golden or args.verify:
+        failed = run_golden(
+            args.days, args.record_golden, args.jobs or None, timeout=args.timeout
+        )
+        sys.exit(1 if failed else 0)
+    elif args.memory:
+        run_memory_profile(args.days, args.jobs, args.memory_sites, args.memory_json)
+    elif args.profile:
+        run_cpu_profile(
+            args.days,
+            args.jobs,
+            args.profile_dir,
+            args.profile_top,
+            args.profile_function,
+        )
+    elif args.in_process:
+        search_stats = dict()
+        if args.tests:
+            run_tests(args.days, search_stats)
+        if args.solutions:
+            get_solutions(args.days, args.memoize, args.force, search_stats)
+        if parse_cache.enabled:
+            print_parse_cache_stats(parse_cache.stats)
+        print_path_search_stats(search_stats)
+    else:
+        failed = run_parallel(
+            args.days,
+            args.tests,
+            args.solutions,
+            args.memoize,
+            args.force,
+            1 if args.jobs is None else args.jobs or None,
+            timeout=args.timeout,
+        )
+        sys.exit(1 if failed else 0)
@@ -0,0 +1,35 @@
+# vi: set shiftwidth=4 tabstop=4 expandtab:
+import os
+
+# NumPy is optional: only days with a NumPy implementation use it, and only
+# when it is selected
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+available = ["python"] + (["numpy"] if numpy is not None else [])
+
+# Selected with AOC_BACKEND=numpy or with select()
+selected = os.environ.get("AOC_BACKEND", "python")
+
+
+def check(backend):
+    if backend not in available:
+        raise ValueError(
+            "Backend %s is not available (available: %s)"
+            % (backend, ", ".join(available))
+        )
+    return backend
+
+
+def select(backend):
+    # Environment is updated as well so that child processes inherit the setting
+    global selected
+    selected = check(backend)
+    os.environ["AOC_BACKEND"] = backend
+
+
+def get(backend=None):
+    # Backend given explicitly or, by default, the one selected
+    return check(selected if backend is None else backend)
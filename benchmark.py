@@ -0,0 +1,486 @@
+# vi: set shiftwidth=4 tabstop=4 expandtab:
+import argparse
+import collections
+import contextlib
+import copy
+import datetime
+import fnmatch
+import glob
+import inspect
+import io
+import json
+import math
+import multiprocessing
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import all_days
+import backends
+import input_generators
+import parse_cache
+
+SolverCall = collections.namedtuple("SolverCall", ["name", "func", "args", "kwargs"])
+LazyGenerator = collections.namedtuple("LazyGenerator", ["func", "args", "kwargs"])
+
+
+def is_test(name):
+    return name == "run_tests" or name.endswith("_tests")
+
+
+def is_solver(func, module):
+    # Public functions defined in the day module itself
+    return (
+        inspect.isfunction(func)
+        and func.__module__ == module.__name__
+        and not func.__name__.startswith("_")
+        and not is_test(func.__name__)
+        and func.__name__ != "get_solutions"
+    )
+
+
+def get_call_arguments(frame):
+    # Rebuild the arguments of a call from the frame, when the function starts
+    code = frame.f_code
+    names = code.co_varnames
+    nb_pos, nb_kw = code.co_argcount, code.co_kwonlyargcount
+    local_vars = frame.f_locals
+    args = [local_vars[n] for n in names[:nb_pos]]
+    kwargs = {n: local_vars[n] for n in names[nb_pos : nb_pos + nb_kw]}
+    i = nb_pos + nb_kw
+    if code.co_flags & inspect.CO_VARARGS:
+        args.extend(local_vars[names[i]])
+        i += 1
+    if code.co_flags & inspect.CO_VARKEYWORDS:
+        kwargs.update(local_vars[names[i]])
+    return args, kwargs
+
+
+def freeze_generator(value, solvers):
+    # Generators cannot be copied: those from solver functions which did not
+    # start yet (streamed inputs) are created again for each run instead
+    if (
+        inspect.isgenerator(value)
+        and value.gi_code in solvers
+        and inspect.getgeneratorstate(value) == inspect.GEN_CREATED
+    ):
+        return LazyGenerator(
+            solvers[value.gi_code], *get_call_arguments(value.gi_frame)
+        )
+    return value
+
+
+def thaw_generator(value):
+    if isinstance(value, LazyGenerator):
+        return value.func(*value.args, **value.kwargs)
+    return value
+
+
+def get_arguments(call):
+    # Fresh arguments for a run: functions may alter them
+    args, kwargs = copy.deepcopy(call.args), copy.deepcopy(call.kwargs)
+    args = [thaw_generator(v) for v in args]
+    kwargs = {k: thaw_generator(v) for k, v in kwargs.items()}
+    return args, kwargs
+
+
+def get_solver_calls(module, entry_point="get_solutions"):
+    # Run the entry point once and record the solver functions it calls
+    # directly, along with (a copy of) their arguments
+    # Tests are often split in several functions: calls from any of them count
+    solvers = {f.__code__: f for f in vars(module).values() if is_solver(f, module)}
+    entry_codes = [getattr(module, entry_point).__code__]
+    if is_test(entry_point):
+        entry_codes.extend(
+            f.__code__
+            for name, f in vars(module).items()
+            if inspect.isfunction(f) and is_test(name)
+        )
+    calls = []
+    # Generators trigger a "call" event each time they are resumed
+    # (frames are kept alive so that their ids are not reused)
+    frames_seen = dict()
+    names = collections.Counter()
+
+    def profiler(frame, event, arg):
+        if event != "call" or frame.f_code not in solvers:
+            return
+        caller = frame.f_back
+        if caller is None or caller.f_code not in entry_codes:
+            return
+        if id(frame) in frames_seen:
+            return
+        frames_seen[id(frame)] = frame
+        func = solvers[frame.f_code]
+        args, kwargs = get_call_arguments(frame)
+        args = [freeze_generator(v, solvers) for v in args]
+        kwargs = {k: freeze_generator(v, solvers) for k, v in kwargs.items()}
+        name = "%s.%s" % (module.__name__, func.__name__)
+        names[name] += 1
+        if names[name] > 1:
+            name += "#%d" % names[name]
+        calls.append(SolverCall(name, func, copy.deepcopy(args), copy.deepcopy(kwargs)))
+
+    sys.setprofile(profiler)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            getattr(module, entry_point)()
+    finally:
+        sys.setprofile(None)
+    return calls
+
+
+def run_call(call):
+    # Arguments are prepared outside of the timed section
+    args, kwargs = get_arguments(call)
+    with contextlib.redirect_stdout(io.StringIO()):
+        begin = time.perf_counter()
+        ret = call.func(*args, **kwargs)
+        if inspect.isgenerator(ret):
+            collections.deque(ret, maxlen=0)
+        return time.perf_counter() - begin
+
+
+def percentile(sorted_values, p):
+    # Nearest-rank percentile
+    rank = max(1, math.ceil(p / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def get_statistics(timings):
+    timings = sorted(timings)
+    return {
+        "runs": len(timings),
+        "min": timings[0],
+        "median": statistics.median(timings),
+        "p95": percentile(timings, 95),
+        "mean": statistics.mean(timings),
+        "stdev": statistics.stdev(timings) if len(timings) > 1 else 0.0,
+    }
+
+
+def benchmark_call(call, warmup, repeat):
+    for _ in range(warmup):
+        run_call(call)
+    return get_statistics([run_call(call) for _ in range(repeat)])
+
+
+def compare_to_baseline(results, baseline, threshold):
+    regressions = []
+    for name, stats in results.items():
+        ref = baseline.get(name)
+        if ref is not None:
+            ratio = stats["median"] / ref["median"] if ref["median"] else math.inf
+            if ratio > 1 + threshold:
+                regressions.append((name, ref["median"], stats["median"], ratio))
+    return regressions
+
+
+def format_line(name, stats):
+    return "%-40s %10.6f %10.6f %10.6f %5d" % (
+        name,
+        stats["min"],
+        stats["median"],
+        stats["p95"],
+        stats["runs"],
+    )
+
+
+def matches(name, patterns):
+    return not patterns or any(fnmatch.fnmatch(name, p) for p in patterns)
+
+
+def measure_scaling_point(day_num, size, warmup, repeat, patterns, backend=None):
+    # Solver calls recorded from get_solutions on a generated input written
+    # in place of the actual input files, in a temporary directory
+    if backend is not None:
+        backends.select(backend)
+    module, _ = all_days.import_day(day_num)
+    input_files = sorted(
+        os.path.basename(path)
+        for path in glob.glob(
+            os.path.join(all_days.repo_dir, "%s_input*.txt" % module.__name__)
+        )
+    )
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for seed, input_file in enumerate(input_files):
+            with open(os.path.join(tmp_dir, input_file), "w") as f:
+                f.write(input_generators.generate(day_num, size, seed))
+        os.chdir(tmp_dir)
+        return {
+            call.name: benchmark_call(call, warmup, repeat)["median"]
+            for call in get_solver_calls(module)
+            if matches(call.name, patterns)
+        }
+
+
+def scaling_worker(connection, *args):
+    try:
+        connection.send(("OK", measure_scaling_point(*args)))
+    except BaseException as e:
+        connection.send(("FAILED", "%s: %s" % (type(e).__name__, e)))
+
+
+def run_scaling_point(day_num, size, warmup, repeat, patterns, max_time, backend=None):
+    # In a child process which is killed after max_time seconds
+    # Returns (status, timings or error message)
+    parent_connection, child_connection = multiprocessing.Pipe(duplex=False)
+    process = multiprocessing.Process(
+        target=scaling_worker,
+        args=(child_connection, day_num, size, warmup, repeat, patterns, backend),
+    )
+    process.start()
+    if parent_connection.poll(max_time):
+        status, res = parent_connection.recv()
+    else:
+        status, res = "TIMEOUT", "more than %ds" % max_time
+    process.kill()
+    process.join()
+    return status, res
+
+
+def get_growth_exponent(size1, time1, size2, time2):
+    # Slope on a log-log scale: time ~ size ** exponent
+    if min(size1, time1, size2, time2) <= 0 or size1 == size2:
+        return math.nan
+    return math.log(time2 / time1) / math.log(size2 / size1)
+
+
+def get_crossover(points, points2):
+    # Smallest size from which the second series is faster than the first
+    # one for every larger size as well
+    crossover = None
+    for (size, duration), (_, duration2) in zip(points, points2):
+        if duration2 < duration:
+            crossover = size if crossover is None else crossover
+        else:
+            crossover = None
+    return crossover
+
+
+def print_scaling_line(name, points):
+    line = []
+    for i, (size, duration) in enumerate(points):
+        line.append("%d: %.6f" % (size, duration))
+        if i:
+            exponent = get_growth_exponent(*points[i - 1], size, duration)
+            line[-1] += " (%.2f)" % exponent
+    print("    %-36s %s" % (name, ", ".join(line)))
+
+
+def run_scaling(days, sizes, warmup, repeat, patterns, max_time, backend_names=None):
+    # Sizes grow until a size does not complete in time for a day
+    # With several backends, function names get the backend as a suffix and
+    # the total time of the solver calls is compared between backends
+    backend_names = backend_names or [None]
+    results = dict()
+    for day_num in days:
+        day_name = all_days.get_day_name(day_num)
+        day_sizes = sizes or input_generators.default_sizes[day_num]
+        timings = collections.OrderedDict()
+        totals = collections.OrderedDict((b, []) for b in backend_names)
+        print("%s (size: time in seconds, growth exponent)" % day_name)
+        for size in day_sizes:
+            points = dict()
+            for backend in backend_names:
+                status, res = run_scaling_point(
+                    day_num, size, warmup, repeat, patterns, max_time, backend
+                )
+                if status != "OK":
+                    print("    size %d: %s (%s)" % (size, status, res))
+                    break
+                points[backend] = res
+            if len(points) != len(backend_names):
+                break
+            for backend, res in points.items():
+                suffix = "" if len(backend_names) == 1 else "[%s]" % backend
+                for name, duration in res.items():
+                    timings.setdefault(name + suffix, []).append((size, duration))
+                totals[backend].append((size, sum(res.values())))
+        for name, points in timings.items():
+            print_scaling_line(name, points)
+        if len(backend_names) > 1:
+            reference, *others = backend_names
+            for backend in backend_names:
+                print_scaling_line("total[%s]" % backend, totals[backend])
+            for backend in others:
+                crossover = get_crossover(totals[reference], totals[backend])
+                print(
+                    "    %s faster than %s: %s"
+                    % (
+                        backend,
+                        reference,
+                        "never" if crossover is None else "from size %d" % crossover,
+                    )
+                )
+        results[day_name] = timings
+    return results
+
+
+def plot_scaling(results, plot_dir):
+    # matplotlib is optional: only needed for the plots
+    try:
+        import matplotlib
+
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+    except ImportError:
+        print("matplotlib is not available: no plot generated")
+        return
+    os.makedirs(plot_dir, exist_ok=True)
+    for day_name, timings in results.items():
+        if not timings:
+            continue
+        fig, ax = plt.subplots()
+        for name, points in timings.items():
+            ax.plot(*zip(*points), marker="o", label=name)
+        ax.set_xscale("log")
+        ax.set_yscale("log")
+        ax.set_xlabel("input size")
+        ax.set_ylabel("time (s)")
+        ax.set_title(day_name)
+        ax.legend(fontsize="small")
+        fig.savefig(os.path.join(plot_dir, "%s.png" % day_name))
+        plt.close(fig)
+
+
+def get_args():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the solver functions of each day on the actual input"
+    )
+    parser.add_argument(
+        "days",
+        nargs="*",
+        default=[],
+        help="days to benchmark, e.g. '15' or '19-22' (all by default)",
+    )
+    parser.add_argument(
+        "-f",
+        "--function",
+        action="append",
+        help="only benchmark matching functions, e.g. 'day15.shortest_path' or 'day22.*'",
+    )
+    parser.add_argument(
+        "--tests",
+        action="store_true",
+        help="use the calls from run_tests (examples) instead of get_solutions",
+    )
+    parser.add_argument(
+        "--parse-cache",
+        action="store_true",
+        help="cache parsed inputs on disk (see parse_cache.py)",
+    )
+    parser.add_argument(
+        "--scaling",
+        action="store_true",
+        help="measure runtime against the size of generated inputs "
+        "(see input_generators.py) instead of the actual input",
+    )
+    parser.add_argument(
+        "--sizes",
+        type=lambda s: [int(v) for v in s.split(",")],
+        help="with --scaling: comma-separated input sizes (default: per day)",
+    )
+    parser.add_argument(
+        "--max-time",
+        type=float,
+        default=60,
+        help="with --scaling: time limit in seconds for each input size (default: 60)",
+    )
+    parser.add_argument(
+        "--backends",
+        type=lambda s: [backends.check(b) for b in s.split(",")],
+        help="with --scaling: comma-separated backends to compare, e.g. "
+        "'python,numpy' (default: the selected one)",
+    )
+    parser.add_argument(
+        "--plot", help="with --scaling: directory for log-log plots (needs matplotlib)"
+    )
+    parser.add_argument("-w", "--warmup", type=int)
+    parser.add_argument("-r", "--repeat", type=int)
+    parser.add_argument("-o", "--output", help="write results to a JSON file")
+    parser.add_argument("-b", "--baseline", help="compare to results in a JSON file")
+    parser.add_argument(
+        "-t",
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="relative slowdown of the median considered a regression (default: 0.1)",
+    )
+    args = parser.parse_args()
+    try:
+        args.days = all_days.parse_days(args.days) if args.days else all_days.all_days
+    except ValueError as e:
+        parser.error(str(e))
+    # Scaling uses large inputs: a single run is the default
+    if args.warmup is None:
+        args.warmup = 0 if args.scaling else 1
+    if args.repeat is None:
+        args.repeat = 1 if args.scaling else 5
+    return args
+
+
+def main_scaling(args):
+    results = run_scaling(
+        args.days,
+        args.sizes,
+        args.warmup,
+        args.repeat,
+        args.function,
+        args.max_time,
+        args.backends,
+    )
+    if args.plot:
+        plot_scaling(results, args.plot)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=4)
+    return 0
+
+
+def main():
+    args = get_args()
+    if args.scaling:
+        return main_scaling(args)
+    entry_point = "run_tests" if args.tests else "get_solutions"
+    if args.parse_cache:
+        parse_cache.enable()
+    results = dict()
+    print("%-40s %10s %10s %10s %5s" % ("Function", "min (s)", "median", "p95", "runs"))
+    for day_num in args.days:
+        module, _ = all_days.import_day(day_num)
+        for call in get_solver_calls(module, entry_point):
+            if not matches(call.name, args.function):
+                continue
+            stats = benchmark_call(call, args.warmup, args.repeat)
+            results[call.name] = stats
+            print(format_line(call.name, stats))
+    if parse_cache.enabled:
+        all_days.print_parse_cache_stats(parse_cache.stats)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(
+                {
+                    "date": datetime.datetime.now().isoformat(),
+                    "python": sys.version,
+                    "entry_point": entry_point,
+                    "results": results,
+                },
+                f,
+                indent=4,
+            )
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+        regressions = compare_to_baseline(results, baseline, args.threshold)
+        for name, ref, new, ratio in regressions:
+            print("Regression: %s %.6fs -> %.6fs (x%.2f)" % (name, ref, new, ratio))
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
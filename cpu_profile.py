@@ -0,0 +1,84 @@
+# vi: set shiftwidth=4 tabstop=4 expandtab:
+import cProfile
+import contextlib
+import functools
+import importlib
+import inspect
+import io
+import os
+import pstats
+
+
+def wrap_with_profiler(func, profiler):
+    # The profiler is only enabled while the function runs: nested and
+    # recursive calls are handled with a depth counter
+    depth = 0
+
+    @contextlib.contextmanager
+    def profiling():
+        nonlocal depth
+        if depth == 0:
+            profiler.enable()
+        depth += 1
+        try:
+            yield
+        finally:
+            depth -= 1
+            if depth == 0:
+                profiler.disable()
+
+    if inspect.isgeneratorfunction(func):
+        # Generators are profiled each time they are resumed
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            gen = func(*args, **kwargs)
+            while True:
+                with profiling():
+                    try:
+                        value = next(gen)
+                    except StopIteration as e:
+                        return e.value
+                yield value
+
+    else:
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with profiling():
+                return func(*args, **kwargs)
+
+    return wrapper
+
+
+def split_function_name(function_name):
+    # "day23.get_moves" -> (23, "get_moves")
+    module_name, sep, func_name = function_name.partition(".")
+    if not sep or not module_name.startswith("day"):
+        raise ValueError("Invalid function name: %s" % function_name)
+    return int(module_name[len("day") :]), func_name
+
+
+def profile_day(day_num, prof_dir="profiles", top=20, func_name=None):
+    # Profile get_solutions() or, if a function name is provided, only the
+    # calls to that function performed by get_solutions()
+    module = importlib.import_module("day%d" % day_num)
+    profiler = cProfile.Profile()
+    name = module.__name__
+    with contextlib.redirect_stdout(io.StringIO()):
+        if func_name is None:
+            profiler.runcall(module.get_solutions)
+        else:
+            name += "." + func_name
+            original = getattr(module, func_name)
+            setattr(module, func_name, wrap_with_profiler(original, profiler))
+            try:
+                module.get_solutions()
+            finally:
+                setattr(module, func_name, original)
+    os.makedirs(prof_dir, exist_ok=True)
+    prof_path = os.path.join(prof_dir, "%s.prof" % name)
+    profiler.dump_stats(prof_path)
+    report = io.StringIO()
+    stats = pstats.Stats(profiler, stream=report)
+    stats.strip_dirs().sort_stats(pstats.SortKey.CUMULATIVE).print_stats(top)
+    return "Profile of %s written to %s\n%s" % (name, prof_path, report.getvalue())
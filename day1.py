@@ -1,29 +1,79 @@
 # vi: set shiftwidth=4 tabstop=4 expandtab:
 import datetime
+import collections
 
+import backends
+import parse_cache
 
+
+@parse_cache.cached_parser
 def get_depths_from_file(file_path="day1_input.txt"):
     with open(file_path) as f:
         return [int(l.strip()) for l in f]
 
 
-def get_nb_increments(depths, windowsize=1):
+def get_depths_array_from_file(file_path="day1_input.txt"):
+    # Whole file parsed in bulk, whitespace being the separator
+    with open(file_path) as f:
+        return backends.numpy.fromstring(f.read(), dtype=backends.numpy.int64, sep=" ")
+
+
+def iter_depths_from_file(file_path="day1_input.txt"):
+    with open(file_path) as f:
+        for l in f:
+            yield int(l)
+
+
+def get_nb_increments(depths, windowsize=1, backend=None):
     # Window(n + 1) > Window(n)
     # d(n+1) + d(n+2) + ... + d(n+1+windowsize) > d(n) + d(n+1) + ... + d(n+windowsize)
     # d(n+1+windowsize) > d(n)
+    if backends.get(backend) == "numpy":
+        depths = backends.numpy.asarray(depths)
+        return int(
+            backends.numpy.count_nonzero(depths[windowsize:] > depths[:-windowsize])
+        )
     return sum(last > first for first, last in zip(depths, depths[windowsize:]))
 
 
+def get_nb_increments_streaming(depths, windowsizes=(1,)):
+    # Same comparison in a single pass over any iterable, keeping only the
+    # last max(windowsizes) depths in a ring buffer
+    buffer = collections.deque(maxlen=max(windowsizes))
+    counts = [0] * len(windowsizes)
+    for depth in depths:
+        nb = len(buffer)
+        for i, windowsize in enumerate(windowsizes):
+            if windowsize <= nb and depth > buffer[-windowsize]:
+                counts[i] += 1
+        buffer.append(depth)
+    return counts
+
+
 def run_tests():
     depths = [199, 200, 208, 210, 200, 207, 240, 269, 260, 263]
-    assert get_nb_increments(depths) == 7
-    assert get_nb_increments(depths, 3) == 5
+    for backend in backends.available:
+        assert get_nb_increments(depths, backend=backend) == 7
+        assert get_nb_increments(depths, 3, backend) == 5
+        for w in range(1, len(depths) + 2):
+            assert get_nb_increments(depths, w, backend) == get_nb_increments(
+                depths, w, "python"
+            )
+    assert get_nb_increments_streaming(iter(depths), (1, 3)) == [7, 5]
+    windowsizes = range(1, len(depths) + 2)
+    assert get_nb_increments_streaming(depths, windowsizes) == [
+        get_nb_increments(depths, w) for w in windowsizes
+    ]
 
 
 def get_solutions():
-    depths = get_depths_from_file()
-    print(get_nb_increments(depths))
-    print(get_nb_increments(depths, 3))
+    if backends.get() == "numpy":
+        depths = get_depths_array_from_file()
+        nb1, nb3 = get_nb_increments(depths), get_nb_increments(depths, 3)
+    else:
+        nb1, nb3 = get_nb_increments_streaming(iter_depths_from_file(), (1, 3))
+    print(nb1)
+    print(nb3)
 
 
 if __name__ == "__main__":
@@ -2,7 +2,10 @@
 import datetime
 import collections
 
+import parse_cache
 
+
+@parse_cache.cached_parser
 def get_lines_from_file(file_path="day10_input.txt"):
     with open(file_path) as f:
         return [l.strip() for l in f]
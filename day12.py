@@ -1,6 +1,8 @@
 # vi: set shiftwidth=4 tabstop=4 expandtab:
 import datetime
 
+import parse_cache
+
 
 def get_map_item_from_line(l, sep="-"):
     a, b, c = l.partition(sep)
@@ -12,6 +14,7 @@ def get_map_from_lines(lines):
     return [get_map_item_from_line(l.strip()) for l in lines]
 
 
+@parse_cache.cached_parser
 def get_map_from_file(file_path="day12_input.txt"):
     with open(file_path) as f:
         return get_map_from_lines(f)
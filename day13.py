@@ -1,6 +1,8 @@
 # vi: set shiftwidth=4 tabstop=4 expandtab:
 import datetime
 
+import parse_cache
+
 
 def get_info_from_lines(lines, fold_instr="fold along "):
     read_dot = True
@@ -18,6 +20,7 @@ def get_info_from_lines(lines, fold_instr="fold along "):
     return dots, folds
 
 
+@parse_cache.cached_parser
 def get_info_from_file(file_path="day13_input.txt"):
     with open(file_path) as f:
         return get_info_from_lines(f)
@@ -2,6 +2,9 @@
 import datetime
 import collections
 
+import linear_recurrence
+import parse_cache
+
 
 def get_pair_insertion_rules(line, sep=" -> "):
     left, mid, right = line.partition(sep)
@@ -16,6 +19,7 @@ def get_info_from_lines(lines):
     return template, rules
 
 
+@parse_cache.cached_parser
 def get_info_from_file(file_path="day14_input.txt"):
     with open(file_path) as f:
         return get_info_from_lines(f)
@@ -52,6 +56,12 @@ def get_fast_quantity(template, rules, steps):
             for pair2 in rules2.get(pair, [pair]):
                 pairs2[pair2] += count
         pairs = pairs2
+    return get_quantity_from_pairs(template, pairs)
+
+
+def get_quantity_from_pairs(template, pairs):
+    # Each letter is counted twice, in the pair on its left and the one on its
+    # right, except for the first and last letters which never change
     letter_count = collections.Counter(template) - collections.Counter(template[1:-1])
     for (a, b), count in pairs.items():
         letter_count[a] += count
@@ -61,6 +71,21 @@ def get_fast_quantity(template, rules, steps):
     return (commons[0][1] // 2) - (commons[-1][1] // 2)
 
 
+def get_matrix_quantity(template, rules, steps, method=None):
+    transitions = lambda pair: (
+        [((pair[0], rules[pair]), 1), ((rules[pair], pair[1]), 1)]
+        if pair in rules
+        else [(pair, 1)]
+    )
+    pairs = collections.Counter(zip(template, template[1:]))
+    index, matrix = linear_recurrence.build_matrix(pairs, transitions)
+    vector = linear_recurrence.get_vector(index, pairs)
+    vector = linear_recurrence.advance(matrix, vector, steps, method)
+    return get_quantity_from_pairs(
+        template, {pair: vector[i] for pair, i in index.items() if vector[i]}
+    )
+
+
 def run_tests():
     info = """NNCB
 
@@ -92,12 +117,16 @@ CN -> C""".splitlines()
             fast = get_fast_quantity(t, rules, n)
             slow = get_quantity(t, rules, n)
             assert fast == slow
+        for n in [0, 1, 2, 10, 40, 100]:
+            fast = get_fast_quantity(t, rules, n)
+            for method in ("stepping", "squaring"):
+                assert get_matrix_quantity(t, rules, n, method) == fast
 
 
 def get_solutions():
     template, rules = get_info_from_file()
     print(get_quantity(template, rules, 10))
-    print(get_fast_quantity(template, rules, 40))
+    print(get_matrix_quantity(template, rules, 40))
 
 
 if __name__ == "__main__":
@@ -1,68 +1,63 @@
 # vi: set shiftwidth=4 tabstop=4 expandtab:
 import datetime
-import heapq
-
-# Everything looks a lot like AOC 2019 Day 2020
-
-
-def get_grid_from_file(file_path="day15_input.txt"):
-    with open(file_path) as f:
-        return [l.strip() for l in f]
 
+import grid
+import parse_cache
+import path_search
 
-def points_iter(grid):
-    for x, line in enumerate(grid):
-        for y, val in enumerate(line):
-            yield (x, y), int(val)
-
-
-def neighbours(pos):
-    x, y = pos
-    for dx, dy in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
-        yield x + dx, y + dy
+# Everything looks a lot like AOC 2019 Day 2020
 
 
-def build_graph(points):
-    return {p: {p2: points[p2] for p2 in neighbours(p) if p2 in points} for p in points}
+DIGITS = "0123456789"
 
 
-def shortest_path(points):
-    entrance = min(points)
-    exit = max(points)
-    graph = build_graph(points)
-    distances = dict()
-    heap = [(0, entrance)]
-    while heap:
-        d, pos = heapq.heappop(heap)
-        if pos == exit:
-            return d
-        if pos in distances:
-            assert d >= distances[pos]
-            continue
-        distances[pos] = d
-        for pos2, d2 in graph[pos].items():
-            if pos2 not in distances:
-                heapq.heappush(heap, ((d + d2), pos2))
-    assert False
+def get_grid_from_lines(lines):
+    return grid.Grid.from_lines((l.strip() for l in lines), DIGITS)
 
 
-def multiply_points(points, n):
-    h = 1 + max(p[0] for p in points)
-    w = 1 + max(p[1] for p in points)
-    points2 = dict()
+@parse_cache.cached_parser
+def get_grid_from_file(file_path="day15_input.txt"):
+    with open(file_path) as f:
+        return get_grid_from_lines(f)
+
+
+def shortest_path(risks, search="dial"):
+    exit = len(risks) - 1
+    values = risks.values
+    neighbours_table = risks.neighbours_table()
+    neighbours = lambda pos: ((pos2, values[pos2]) for pos2 in neighbours_table[pos])
+    is_goal = lambda pos: pos == exit
+    if search == "dijkstra":
+        goal, distances = path_search.dijkstra(0, neighbours, is_goal)
+    elif search == "dial":
+        goal, distances = path_search.dial(0, neighbours, is_goal, max_weight=9)
+    else:
+        # Each step costs at least 1
+        assert search == "a_star"
+        exit_x, exit_y = risks.position(exit)
+        heuristic = lambda pos: sum(
+            abs(a - b) for a, b in zip(risks.position(pos), (exit_x, exit_y))
+        )
+        goal, distances = path_search.a_star(0, neighbours, heuristic, is_goal)
+    assert goal == exit
+    return distances[goal]
+
+
+def multiply_grid(risks, n):
+    h, w = risks.height, risks.width
+    risks2 = grid.Grid(h * n, w * n)
     for i in range(0, n):
         for j in range(0, n):
             add = i + j
-            for (x, y), val in points.items():
-                val2 = val + add
-                if val2 > 9:
-                    val2 -= 9
-                points2[(x + i * h, y + j * w)] = val2
-    return points2
+            for x, row in enumerate(risks.rows()):
+                row2 = bytes((val + add - 1) % 9 + 1 for val in row)
+                start = risks2.index(x + i * h, j * w)
+                risks2.values[start : start + w] = row2
+    return risks2
 
 
 def run_tests():
-    grid = [
+    lines = [
         "1163751742",
         "1381373672",
         "2136511328",
@@ -74,18 +69,18 @@ def run_tests():
         "1293138521",
         "2311944581",
     ]
-    points = dict(points_iter(grid))
-    assert shortest_path(points) == 40
-    points2 = multiply_points(points, 5)
-    assert shortest_path(points2) == 315
+    risks = get_grid_from_lines(lines)
+    risks2 = multiply_grid(risks, 5)
+    for search in ("dijkstra", "dial", "a_star"):
+        assert shortest_path(risks, search) == 40
+        assert shortest_path(risks2, search) == 315
 
 
 def get_solutions():
-    grid = get_grid_from_file()
-    points = dict(points_iter(grid))
-    print(shortest_path(points))
-    points2 = multiply_points(points, 5)
-    print(shortest_path(points2))
+    risks = get_grid_from_file()
+    print(shortest_path(risks))
+    risks2 = multiply_grid(risks, 5)
+    print(shortest_path(risks2))
 
 
 if __name__ == "__main__":
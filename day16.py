@@ -4,7 +4,10 @@ import collections
 import functools
 import operator
 
+import parse_cache
 
+
+@parse_cache.cached_parser
 def get_str_from_file(file_path="day16_input.txt"):
     with open(file_path) as f:
         for l in f:
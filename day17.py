@@ -3,6 +3,8 @@ import datetime
 import re
 import math
 
+import parse_cache
+
 target_area_re = r"^target area: x=([-0-9]+)..([-0-9]+), y=([-0-9]+)..([-0-9]+)$"
 
 
@@ -11,6 +13,7 @@ def get_target_area_from_string(s):
     return [int(v) for v in m.group(1, 2, 3, 4)]
 
 
+@parse_cache.cached_parser
 def get_target_area_from_file(file_path="day17_input.txt"):
     with open(file_path) as f:
         for l in f:
@@ -2,6 +2,8 @@
 import datetime
 import itertools
 
+import parse_cache
+
 
 def get_pair_from_str(s):
     digits = []
@@ -24,6 +26,7 @@ def get_pair_from_str(s):
     return pair
 
 
+@parse_cache.cached_parser
 def get_pairs_from_file(file_path="day18_input.txt"):
     with open(file_path) as f:
         return [get_pair_from_str(l.strip()) for l in f]
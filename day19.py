@@ -4,6 +4,8 @@ import re
 import itertools
 import collections
 
+import parse_cache
+
 scanner_re = r"^--- scanner (\d+) ---$"
 
 
@@ -28,6 +30,7 @@ def get_info_from_lines(lines):
     return info
 
 
+@parse_cache.cached_parser
 def get_info_from_file(file_path="day19_input.txt"):
     with open(file_path) as f:
         return get_info_from_lines([l.strip() for l in f])
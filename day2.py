@@ -1,39 +1,196 @@
 # vi: set shiftwidth=4 tabstop=4 expandtab:
 import datetime
+import array
+import collections
+import concurrent.futures
+import functools
+import os
+import tempfile
 
+import backends
+import parse_cache
 
+
+@parse_cache.cached_parser
 def get_commands_from_file(file_path="day2_input.txt"):
     with open(file_path) as f:
         return [l.strip().split() for l in f]
 
 
-def get_final_position(commands):
-    hor, depth = 0, 0
-    for c, n in commands:
-        n = int(n)
-        if c == "forward":
-            hor += n
-        elif c == "down":
-            depth += n
-        else:
-            assert c == "up"
-            depth -= n
-    return hor * depth
+OPCODES = {"forward": 0, "down": 1, "up": 2}
+FORWARD, DOWN, UP = range(3)
+
+# Commands compiled to opcodes and amounts: array.array or NumPy arrays
+# depending on the backend, and a list of ints for amounts which do not all
+# fit in 64 bits. Every backend accepts every compiled form.
+CompiledCommands = collections.namedtuple("CompiledCommands", ["opcodes", "amounts"])
+
+
+def compile_words(words, backend=None):
+    # From the flat list of words: command, amount, command, amount...
+    if backends.get(backend) == "numpy":
+        return compile_words_numpy(words)
+    opcodes = array.array("b", (OPCODES[w] for w in words[0::2]))
+    amounts = [int(w) for w in words[1::2]]
+    try:
+        amounts = array.array("q", amounts)
+    except OverflowError:
+        pass
+    return CompiledCommands(opcodes, amounts)
+
+
+def compile_words_numpy(words):
+    np = backends.numpy
+    names = np.array(words[0::2])
+    opcodes = np.full(len(names), -1, dtype=np.int8)
+    for name, opcode in OPCODES.items():
+        opcodes[names == name] = opcode
+    assert (opcodes >= 0).all()
+    try:
+        amounts = np.array(words[1::2], dtype=np.int64)
+    except OverflowError:
+        amounts = [int(w) for w in words[1::2]]
+    return CompiledCommands(opcodes, amounts)
+
+
+def compile_commands(commands, backend=None):
+    return compile_words([w for command in commands for w in command], backend)
+
+
+def get_compiled_commands_from_file(file_path="day2_input.txt", backend=None):
+    with open(file_path) as f:
+        return compile_words(f.read().split(), backend)
+
+
+def get_numpy_arrays(compiled):
+    # Opcodes and amounts as NumPy arrays, or None when sums of amounts could
+    # overflow int64 (the float sum is only used as a bound, with a margin for
+    # rounding errors)
+    np = backends.numpy
+    if isinstance(compiled.amounts, list):
+        return None
+    amounts = np.asarray(compiled.amounts, dtype=np.int64)
+    if np.abs(amounts.astype(np.float64)).sum() >= 2.0**62:
+        return None
+    return np.asarray(compiled.opcodes, dtype=np.int8), amounts
+
+
+def get_final_position_numpy(compiled):
+    arrays = get_numpy_arrays(compiled)
+    if arrays is None:
+        return get_final_position(compiled, "python")
+    opcodes, amounts = arrays
+    hor = amounts[opcodes == FORWARD].sum()
+    depth = amounts[opcodes == DOWN].sum() - amounts[opcodes == UP].sum()
+    return int(hor) * int(depth)
+
 
+def get_final_position2_numpy(compiled):
+    # Aim is the cumulative sum of the up/down amounts, depth is the dot
+    # product of the forward amounts with the aim at that point
+    np = backends.numpy
+    arrays = get_numpy_arrays(compiled)
+    if arrays is not None:
+        opcodes, amounts = arrays
+        forward = np.where(opcodes == FORWARD, amounts, 0)
+        aim = np.cumsum(
+            np.where(opcodes == DOWN, amounts, 0) - np.where(opcodes == UP, amounts, 0)
+        )
+        hor = int(forward.sum())
+        # Partial sums of the dot product are bounded by max |aim| * hor
+        if int(np.abs(aim).max(initial=0)) * hor < 2**63:
+            return hor * int(np.dot(forward, aim))
+    return get_final_position2(compiled, "python")
 
-def get_final_position2(commands):
+
+# The effect of a sequence of commands on (hor, depth, aim) is affine:
+# starting from (h, d, a), it leads to (h + H, d + D + a * H, a + A) where
+# (H, D, A) is the position reached from (0, 0, 0). Summaries of consecutive
+# chunks can be computed independently and composed in order.
+Summary = collections.namedtuple("Summary", ["hor", "depth", "aim"])
+
+
+def summarise(compiled):
+    # Amounts are Python ints so that nothing overflows
+    amounts = compiled.amounts
+    if backends.numpy is not None and isinstance(amounts, backends.numpy.ndarray):
+        amounts = amounts.tolist()
     hor, depth, aim = 0, 0, 0
-    for c, n in commands:
-        n = int(n)
-        if c == "forward":
-            hor += n
-            depth += n * aim
-        elif c == "down":
-            aim += n
+    for opcode, amount in zip(compiled.opcodes, amounts):
+        if opcode == FORWARD:
+            hor += amount
+            depth += amount * aim
+        elif opcode == DOWN:
+            aim += amount
         else:
-            assert c == "up"
-            aim -= n
-    return hor * depth
+            aim -= amount
+    return Summary(hor, depth, aim)
+
+
+def compose(s1, s2):
+    return Summary(
+        s1.hor + s2.hor, s1.depth + s2.depth + s1.aim * s2.hor, s1.aim + s2.aim
+    )
+
+
+def get_file_chunks(file_path, nb_chunks):
+    # Byte ranges of roughly the same size, ending at line boundaries
+    size = os.path.getsize(file_path)
+    bounds = [0]
+    with open(file_path, "rb") as f:
+        for i in range(1, nb_chunks):
+            f.seek(max(bounds[-1], size * i // nb_chunks))
+            f.readline()
+            bounds.append(f.tell())
+    bounds.append(size)
+    return [(b, e) for b, e in zip(bounds, bounds[1:]) if b < e]
+
+
+def summarise_file_chunk(file_path, begin, end):
+    with open(file_path, "rb") as f:
+        f.seek(begin)
+        words = f.read(end - begin).decode().split()
+    return summarise(compile_words(words, "python"))
+
+
+# Inputs from this size are read and summarised in parallel chunks
+parallel_min_size = 1 << 26
+
+
+def get_final_positions_parallel(
+    file_path="day2_input.txt", jobs=None, chunk_size=1 << 24
+):
+    # Returns the answers for both parts: with aim starting at 0, the aim of
+    # part 2 is the depth of part 1
+    nb_chunks = max(1, os.path.getsize(file_path) // chunk_size)
+    chunks = get_file_chunks(file_path, nb_chunks)
+    args = ([file_path] * len(chunks), *zip(*chunks))
+    if jobs == 1:
+        summaries = map(summarise_file_chunk, *args)
+    else:
+        executor = concurrent.futures.ProcessPoolExecutor(jobs)
+        with executor:
+            summaries = list(executor.map(summarise_file_chunk, *args))
+    summary = functools.reduce(compose, summaries, Summary(0, 0, 0))
+    return summary.hor * summary.aim, summary.hor * summary.depth
+
+
+def get_final_position(commands, backend=None):
+    if not isinstance(commands, CompiledCommands):
+        commands = compile_commands(commands, backend)
+    if backends.get(backend) == "numpy":
+        return get_final_position_numpy(commands)
+    summary = summarise(commands)
+    return summary.hor * summary.aim
+
+
+def get_final_position2(commands, backend=None):
+    if not isinstance(commands, CompiledCommands):
+        commands = compile_commands(commands, backend)
+    if backends.get(backend) == "numpy":
+        return get_final_position2_numpy(commands)
+    summary = summarise(commands)
+    return summary.hor * summary.depth
 
 
 def run_tests():
@@ -45,12 +202,59 @@ def run_tests():
         ["down", "8"],
         ["forward", "2"],
     ]
-    assert get_final_position(commands) == 150
-    assert get_final_position2(commands) == 900
+    for backend in backends.available:
+        assert get_final_position(commands, backend) == 150
+        assert get_final_position2(commands, backend) == 900
+    # Commands compiled for a backend can be used with any other one
+    for compile_backend in backends.available:
+        compiled = compile_commands(commands, compile_backend)
+        for backend in backends.available:
+            assert get_final_position(compiled, backend) == 150
+            assert get_final_position2(compiled, backend) == 900
+    # Large enough to overflow int64
+    commands2 = [["down", "1000000"]] * 5000 + [["forward", "1000000"]] * 5000
+    for backend in backends.available:
+        assert get_final_position(commands2, backend) == 25 * 10**18
+        assert get_final_position2(commands2, backend) == 125 * 10**27
+    commands2 = [["forward", str(2**62)], ["down", str(2**62)], ["forward", "1"]]
+    for backend in backends.available:
+        assert get_final_position(commands2, backend) == (2**62 + 1) * 2**62
+        assert get_final_position2(commands2, backend) == (2**62 + 1) * 2**62
+    # Amounts which do not fit in 64 bits are kept as exact ints
+    commands2 = [["down", str(2**70)], ["forward", str(2**64)], ["up", "1"]]
+    for compile_backend in backends.available:
+        compiled = compile_commands(commands2, compile_backend)
+        assert compiled.amounts == [2**70, 2**64, 1]
+        for backend in backends.available:
+            assert get_final_position(compiled, backend) == 2**64 * (2**70 - 1)
+            assert get_final_position2(compiled, backend) == 2**64 * 2**134
+    compiled = compile_commands(commands, "python")
+    for i in range(len(commands) + 1):
+        s1 = summarise(compile_commands(commands[:i]))
+        s2 = summarise(compile_commands(commands[i:]))
+        assert compose(s1, s2) == summarise(compiled)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        file_path = os.path.join(tmp_dir, "day2_input.txt")
+        with open(file_path, "w") as f:
+            f.write("".join("%s %s\n" % (c, n) for c, n in commands * 100))
+        compiled = compile_commands(commands * 100)
+        expected = (get_final_position(compiled), get_final_position2(compiled))
+        for chunk_size in (1, 10, 100, 1000, 10000):
+            res = get_final_positions_parallel(file_path, 1, chunk_size)
+            assert res == expected
+        assert get_final_positions_parallel(file_path, 2, 100) == expected
 
 
 def get_solutions():
-    commands = get_commands_from_file()
+    file_path = "day2_input.txt"
+    if backends.get() == "numpy":
+        commands = get_compiled_commands_from_file(file_path)
+    elif os.path.getsize(file_path) >= parallel_min_size:
+        for res in get_final_positions_parallel(file_path):
+            print(res)
+        return
+    else:
+        commands = compile_commands(get_commands_from_file(file_path))
     print(get_final_position(commands))
     print(get_final_position2(commands))
 
@@ -1,6 +1,8 @@
 # vi: set shiftwidth=4 tabstop=4 expandtab:
 import datetime
-import itertools
+
+import grid
+import parse_cache
 
 VALUES = [".", "#"]
 
@@ -8,79 +10,66 @@ VALUES = [".", "#"]
 def get_algo_from_str(s):
     assert len(s) == 512 == 2 ** 9
     assert all(c in VALUES for c in s)
-    return [c == "#" for c in s]
+    return bytes(c == "#" for c in s)
 
 
-def get_points_from_lines(lines):
-    points = set()
-    for x, line in enumerate(lines):
-        for y, val in enumerate(line):
-            assert val in VALUES
-            if val == "#":
-                points.add((x, y))
-    return points
+def get_image_from_lines(lines):
+    assert all(val in VALUES for line in lines for val in line)
+    return grid.Grid.from_lines(lines, VALUES)
 
 
 def get_info_from_lines(lines):
     assert lines[1] == ""
-    return get_algo_from_str(lines[0]), get_points_from_lines(lines[2:])
+    return get_algo_from_str(lines[0]), get_image_from_lines(lines[2:])
 
 
+@parse_cache.cached_parser
 def get_info_from_file(file_path="day20_input.txt"):
     with open(file_path) as f:
         return get_info_from_lines([l.strip() for l in f])
 
 
-def show_points(points):
-    x_vals = [p[0] for p in points]
-    y_vals = [p[1] for p in points]
-    x_range = list(range(min(x_vals), 1 + max(x_vals)))
-    y_range = list(range(min(y_vals), 1 + max(y_vals)))
-    for x in x_range:
-        print("".join(VALUES[(x, y) in points] for y in y_range))
-    print()
-
-
-def get_square(point):
-    x, y = point
-    for dx in [-1, 0, 1]:
-        for dy in [-1, 0, 1]:
-            yield x + dx, y + dy
-
-
-def get_range(vals, width):
-    return range(min(vals) - width, max(vals) + width + 1)
-
-
-def get_square_value(point, points):
-    return int("".join([str(int(p in points)) for p in get_square(point)]), base=2)
-
-
-def enhance(points, algo):
-    assert not algo[0]
-    width = 1  # Width of the border to consider
-    x_range = get_range([p[0] for p in points], width)
-    y_range = get_range([p[1] for p in points], width)
-    return {
-        point
-        for point in itertools.product(x_range, y_range)
-        if algo[get_square_value(point, points)]
-    }
+def show_image(image):
+    image.show("".join(VALUES))
+
+
+def enhance(image, background, algo):
+    # Points outside of the image all have the background value: the image
+    # grows by one point on each side and the background may change
+    # The 9-bit index of a point is updated from the one of the point on its
+    # left by shifting the columns out and the new column in
+    padded = image.pad(2, background)
+    width = padded.width
+    rows = list(padded.rows())
+    image2 = grid.Grid(image.height + 2, image.width + 2)
+    values2 = image2.values
+    i2 = 0
+    for r0, r1, r2 in zip(rows, rows[1:], rows[2:]):
+        index = (
+            (r0[0] << 7)
+            | (r0[1] << 6)
+            | (r1[0] << 4)
+            | (r1[1] << 3)
+            | (r2[0] << 1)
+            | r2[1]
+        )
+        for y in range(2, width):
+            index = ((index << 1) & 0b110110110) | (r0[y] << 6) | (r1[y] << 3) | r2[y]
+            values2[i2] = algo[index]
+            i2 += 1
+    return image2, algo[511 if background else 0]
+
+
+def enhance_n(image, algo, n):
+    background = 0
+    for i in range(n):
+        image, background = enhance(image, background, algo)
+    return image, background
 
 
-def enhance_n(points, algo, n):
-    if not algo[0]:
-        algo_odd, algo_even = algo, algo
-    else:
-        # If algo starts with '#', points in the middle of nowhere gets lit
-        # Instead of keeping track of lit points, let's keep track of unlit points
-        # by reversing the algo values
-        algo_even = [not val for val in algo]
-        # Then on next step, this needs to be taken into account
-        algo_odd = list(reversed(algo))
-    for i in range(n):
-        points = enhance(points, algo_even if i % 2 == 0 else algo_odd)
-    return points
+def count_lit(image, background):
+    assert not background, "Infinite number of lit points"
+    return image.count(1)
 
 
 def run_tests():
@@ -93,11 +82,9 @@ def run_tests():
         "..#..",
         "..###",
     ]
-    points = get_points_from_lines(grid_str)
-    points2 = enhance_n(points, algo, 2)
-    assert len(points2) == 35
-    points50 = enhance_n(points, algo, 50)
-    assert len(points50) == 3351
+    image = get_image_from_lines(grid_str)
+    assert count_lit(*enhance_n(image, algo, 2)) == 35
+    assert count_lit(*enhance_n(image, algo, 50)) == 3351
     # Additional test
     algo_str = "." + "#" * 511
     algo = get_algo_from_str(algo_str)
@@ -106,19 +93,15 @@ def run_tests():
         ".#.",
         "...",
     ]
-    points = get_points_from_lines(grid_str)
-    points1 = enhance_n(points, algo, 1)
-    assert len(points1) == 9
-    points2 = enhance_n(points, algo, 2)
-    assert len(points2) == 25
+    image = get_image_from_lines(grid_str)
+    assert count_lit(*enhance_n(image, algo, 1)) == 9
+    assert count_lit(*enhance_n(image, algo, 2)) == 25
 
 
 def get_solutions():
-    algo, points = get_info_from_file()
-    points2 = enhance_n(points, algo, 2)
-    print(len(points2))
-    points50 = enhance_n(points, algo, 50)
-    print(len(points50))
+    algo, image = get_info_from_file()
+    print(count_lit(*enhance_n(image, algo, 2)))
+    print(count_lit(*enhance_n(image, algo, 50)))
 
 
 if __name__ == "__main__":
@@ -3,11 +3,14 @@ import datetime
 import itertools
 import collections
 
+import parse_cache
+
 
 def get_position_from_line(s):
     return int(s.split(": ")[-1])
 
 
+@parse_cache.cached_parser
 def get_positions_from_file(file_path="day21_input.txt"):
     with open(file_path) as f:
         return [get_position_from_line(l.strip()) for l in f]
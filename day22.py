@@ -4,6 +4,8 @@ import itertools
 import functools
 import operator
 
+import parse_cache
+
 # Parse input
 actions = {
     "on": True,
@@ -27,6 +29,7 @@ def get_instructions_from_strings(lines):
     return [get_instruction_from_string(l.strip()) for l in lines]
 
 
+@parse_cache.cached_parser
 def get_instructions_from_file(file_path="day22_input.txt"):
     with open(file_path) as f:
         return get_instructions_from_strings(f)
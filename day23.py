@@ -1,72 +1,49 @@
 # vi: set shiftwidth=4 tabstop=4 expandtab:
 import datetime
-import itertools
-import heapq
+
+import grid
+import parse_cache
+import path_search
+
+CHARS = " #.ABCD"
+OPEN = CHARS.index(".")
 
 
 def get_points_from_lines(lines):
+    # Amphipods are stored separately: their cells are open in the burrow
+    burrow = grid.Grid.from_lines(lines, CHARS)
     moving_parts = dict()
-    points = set()
-    for i, line in enumerate(lines):
-        for j, val in enumerate(line):
-            pos = (i, j)
-            if val == ".":
-                points.add(pos)
-            elif val in ("ABCD"):
-                points.add(pos)
-                moving_parts[pos] = val
-    return points, moving_parts
+    for i, val in enumerate(burrow.values):
+        if val > OPEN:
+            moving_parts[i] = CHARS[val]
+            burrow.values[i] = OPEN
+    return burrow, moving_parts
 
 
+@parse_cache.cached_parser
 def get_points_from_file(file_path="day23_input.txt"):
     with open(file_path) as f:
         return get_points_from_lines([l.rstrip() for l in f])
 
 
-def show_points(points, moving_parts):
-    points_val = {p: "." for p in points}
-    for pos, val in moving_parts.items():
-        assert pos in points_val
-        points_val[pos] = val
-    x_vals = [p[0] for p in points]
-    y_vals = [p[1] for p in points]
-    x_range = list(range(min(x_vals), 1 + max(x_vals)))
-    y_range = list(range(min(y_vals), 1 + max(y_vals)))
-    for x in x_range:
-        print("".join(points_val.get((x, y), "#") for y in y_range), x)
-    print("".join(str(y) for y in y_range))
-    print()
-
-
-def neighbours(p):
-    x, y = p
-    for delta in (-1, 1):
-        yield x + delta, y
-        yield x, y + delta
-
-
-def get_graph(points, moving_parts):
-    free_points = points - moving_parts.keys()
-    return {p: set(p2 for p2 in neighbours(p) if p2 in free_points) for p in points}
-
-
-def shortest_paths(graph, start):
-    distances = dict()
-    queue = [(0, start)]
-    while queue:
-        d, pos = queue.pop(0)
-        if pos in distances:
-            assert d >= distances[pos]
-        else:
-            distances[pos] = d
-            if all(p in distances for p in graph):
-                break
-            for pos2 in graph[pos]:
-                if pos2 in distances:
-                    assert d + 1 >= distances[pos2]
-                else:
-                    queue.append((d + 1, pos2))
-    return distances
+def show_points(burrow, moving_parts):
+    burrow = burrow.copy()
+    for i, val in moving_parts.items():
+        assert burrow.values[i] == OPEN
+        burrow.values[i] = CHARS.index(val)
+    burrow.show(CHARS)
+
+
+def get_graph(burrow, moving_parts):
+    values = burrow.values
+    neighbours = burrow.neighbours_table()
+    return {
+        i: set(
+            i2 for i2 in neighbours[i] if values[i2] == OPEN and i2 not in moving_parts
+        )
+        for i, val in enumerate(values)
+        if val == OPEN
+    }
 
 
 y_vals = {
@@ -84,29 +61,36 @@ energy_vals = {
 }
 
 
-def destination_rooms(val):
+def destination_rooms(burrow, val):
     y = y_vals[val]
-    return [(3, y), (2, y)]  # Order matters
+    return [burrow.index(3, y), burrow.index(2, y)]  # Order matters
 
 
-def count_wrong_position(moving_parts):
-    c = 0
+def get_placed(burrow, moving_parts):
+    # Amphipods in their destination room with only correct ones below them
+    placed = set()
     for val in y_vals:
-        for pos in destination_rooms(val):
+        for pos in destination_rooms(burrow, val):
             if not moving_parts.get(pos, None) == val:
                 break
-            c += 1
-    return len(moving_parts) - c
+            placed.add(pos)
+    return placed
 
 
-def get_moves(points, moving_parts):
-    graph = get_graph(points, moving_parts)
+def count_wrong_position(burrow, moving_parts):
+    return len(moving_parts) - len(get_placed(burrow, moving_parts))
+
+
+def get_moves(burrow, moving_parts):
+    graph = get_graph(burrow, moving_parts)
     # Amphipods will never stop on the space immediately outside any room
-    hallway = set((x, y) for x, y in points if x == 1 and y not in (3, 5, 7, 9))
-    rooms = set((x, y) for x, y in points if x != 1)
+    hallway = set(
+        i for i, x, y in burrow.positions(OPEN) if x == 1 and y not in (3, 5, 7, 9)
+    )
+    rooms = set(i for i, x, y in burrow.positions(OPEN) if x != 1)
     for pos, val in moving_parts.items():
         destinations = set()
-        room_dests = destination_rooms(val)
+        room_dests = destination_rooms(burrow, val)
         assert all(dest in rooms for dest in room_dests)
 
         # Get final position for element (None if it is busy or if there is no point in going there)
@@ -149,7 +133,7 @@ def get_moves(points, moving_parts):
         if destinations:
             energy = energy_vals[val]
             # Compute distances
-            distances = shortest_paths(graph, pos)
+            _, distances = path_search.bfs(pos, graph.__getitem__)
             for dest in destinations:
                 if dest in distances:
                     dist = distances[dest]
@@ -168,31 +152,39 @@ def hash_mp(moving_parts):
     return tuple(sorted(moving_parts.items()))
 
 
-def organise(points, moving_parts):
-    # (nb_wrong_pos, nb_moves, cost, moving_parts)
-    heap = [(count_wrong_position(moving_parts), 0, 0, hash_mp(moving_parts))]
-    seen = dict()
-    solution = None
-    while heap:
-        nb_wrong_pos, nb_moves, cost, setup = heapq.heappop(heap)
-        if setup in seen and cost >= seen[setup]:
-            continue
-        seen[setup] = cost
-        if solution is not None and cost >= solution:
-            continue
-        setup_dict = dict(setup)
-        if nb_wrong_pos == 0:
-            solution = cost
-            # print(solution, "elements in queue:", len(heap))
-            continue
-        moves = list(get_moves(points, setup_dict))
-        for cost_add, setup2 in moves:
-            nb_moves2 = nb_moves + 1
-            cost2 = cost + cost_add
-            heapq.heappush(
-                heap, (count_wrong_position(setup2), nb_moves2, cost2, hash_mp(setup2))
-            )
-    return solution
+def get_min_energy(burrow, moving_parts):
+    # Lower bound of the energy needed: amphipods out of place go up to the
+    # hallway, to their room and at least one step down; those already in
+    # their room have to step aside and back if they block a wrong one
+    placed = get_placed(burrow, moving_parts)
+    energy = 0
+    for pos, val in moving_parts.items():
+        if pos not in placed:
+            x, y = burrow.position(pos)
+            dy = abs(y - y_vals[val])
+            if dy == 0:
+                blocking = any(
+                    moving_parts.get(dest, val) != val
+                    for dest in destination_rooms(burrow, val)
+                    if burrow.position(dest)[0] > x
+                )
+                steps = (x - 1) + 2 + 1 if blocking else 1
+            else:
+                steps = (x - 1) + dy + 1
+            energy += energy_vals[val] * steps
+    return energy
+
+
+def organise(burrow, moving_parts):
+    goal, energies = path_search.a_star(
+        hash_mp(moving_parts),
+        lambda setup: (
+            (hash_mp(setup2), cost) for cost, setup2 in get_moves(burrow, dict(setup))
+        ),
+        lambda setup: get_min_energy(burrow, dict(setup)),
+        lambda setup: count_wrong_position(burrow, dict(setup)) == 0,
+    )
+    return None if goal is None else energies[goal]
 
 
 def run_tests():
@@ -259,13 +251,13 @@ def run_tests():
         (points7, energy7),
     ]
     for points, energy in tests:
-        points, moving_parts = get_points_from_lines(points)
-        assert organise(points, moving_parts) == energy
+        burrow, moving_parts = get_points_from_lines(points)
+        assert organise(burrow, moving_parts) == energy
 
 
 def get_solutions():
-    points, moving_parts = get_points_from_file()
-    print(organise(points, moving_parts))
+    burrow, moving_parts = get_points_from_file()
+    print(organise(burrow, moving_parts))
 
 
 if __name__ == "__main__":
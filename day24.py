@@ -3,7 +3,10 @@ import datetime
 import math
 import itertools
 
+import parse_cache
 
+
+@parse_cache.cached_parser
 def get_program_from_file(file_path="day24_input.txt"):
     with open(file_path) as f:
         return [l.strip() for l in f]
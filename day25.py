@@ -1,68 +1,45 @@
 # vi: set shiftwidth=4 tabstop=4 expandtab:
 import datetime
-import collections
 import itertools
 
+import grid
+import parse_cache
 
+
+@parse_cache.cached_parser
 def get_sea_from_file(file_path="day25_input.txt"):
     with open(file_path) as f:
         return [l.strip() for l in f]
 
 
-GridInfo = collections.namedtuple(
-    "GridInfo", ["height", "width", "east_facing", "south_facing"]
-)
+CHARS = ".>v"
+EMPTY, EAST, SOUTH = range(len(CHARS))
 
 
 def get_info_from_sea_grid(sea_grid):
-    east_facing = set()  # ">"
-    south_facing = set()  # "v"
-    height = len(sea_grid)
     width = len(sea_grid[0])
-    for i, line in enumerate(sea_grid):
-        assert len(line) == width
-        for j, val in enumerate(line):
-            p = (i, j)
-            if val == "v":
-                south_facing.add(p)
-            elif val == ">":
-                east_facing.add(p)
-            else:
-                assert val == "."
-    return GridInfo(height, width, east_facing, south_facing)
-
-
-def show_sea(grid_info):
-    cucumber = (
-        lambda p: ">"
-        if p in grid_info.east_facing
-        else "v"
-        if p in grid_info.south_facing
-        else "."
-    )
-    for i in range(grid_info.height):
-        print("".join(cucumber((i, j)) for j in range(grid_info.width)))
-    print()
-
-
-def next_step(grid_info):
-    # Move East-facing herd
-    adjacent = [
-        ((i, j), (i, (j + 1) % grid_info.width)) for i, j in grid_info.east_facing
-    ]
-    east2 = set(
-        p1 if (p2 in grid_info.east_facing or p2 in grid_info.south_facing) else p2
-        for p1, p2 in adjacent
-    )
-    # Move South-facing herd
-    adjacent = [
-        ((i, j), ((i + 1) % grid_info.height, j)) for i, j in grid_info.south_facing
-    ]
-    south2 = set(
-        p1 if (p2 in east2 or p2 in grid_info.south_facing) else p2
-        for p1, p2 in adjacent
-    )
-    return GridInfo(grid_info.height, grid_info.width, east2, south2)
+    assert all(len(line) == width for line in sea_grid)
+    return grid.Grid.from_lines(sea_grid, CHARS)
+
+
+def show_sea(sea):
+    sea.show(CHARS)
+
+
+def move_herd(sea, herd, dest):
+    # All the cucumbers of the herd look at their destination before moving
+    values = sea.values
+    moving = [i for i, v in enumerate(values) if v == herd and values[dest[i]] == EMPTY]
+    for i in moving:
+        values[i] = EMPTY
+        values[dest[i]] = herd
+
+
+def next_step(sea):
+    sea2 = sea.copy()
+    move_herd(sea2, EAST, sea2.shift_table(0, 1, wrap=True))
+    move_herd(sea2, SOUTH, sea2.shift_table(1, 0, wrap=True))
+    return sea2
 
 
 def next_steps(info):
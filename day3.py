@@ -1,8 +1,18 @@
 # vi: set shiftwidth=4 tabstop=4 expandtab:
 import datetime
+import array
+import bisect
 import collections
+import concurrent.futures
+import os
+import random
+import sys
+import tempfile
 
+import parse_cache
 
+
+@parse_cache.cached_parser
 def get_diag_from_file(file_path="day3_input.txt"):
     with open(file_path) as f:
         return [l.strip() for l in f]
@@ -33,7 +43,11 @@ def oxygen_rating(diagnostic, i):
 
 
 def co2_rating(diagnostic, i):
-    return other_bit[oxygen_rating(diagnostic, i)]
+    bit_val = other_bit[oxygen_rating(diagnostic, i)]
+    # If all the remaining values share the same bit, none is discarded
+    if all(diag[i] != bit_val for diag in diagnostic):
+        return other_bit[bit_val]
+    return bit_val
 
 
 def apply_bit_criteria(diagnostic, function):
@@ -53,6 +67,111 @@ def get_life_support_rating(diagnostic):
     return int(oxygen, base=2) * int(co2, base=2)
 
 
+# Packed representation: values as ints, sorted, in the smallest array type
+# that can hold them
+PackedDiag = collections.namedtuple("PackedDiag", ["nb_bits", "values"])
+
+
+def pack_values(nb_bits, values):
+    assert nb_bits <= 64
+    typecode = next(t for t in "BHILQ" if array.array(t).itemsize * 8 >= nb_bits)
+    return PackedDiag(nb_bits, array.array(typecode, sorted(values)))
+
+
+def pack_diagnostic(diagnostic):
+    nb_bits = len(diagnostic[0])
+    assert all(len(diag) == nb_bits for diag in diagnostic)
+    return pack_values(nb_bits, (int(diag, base=2) for diag in diagnostic))
+
+
+@parse_cache.cached_parser
+def get_packed_diag_from_file(file_path="day3_input.txt"):
+    with open(file_path) as f:
+        lines = f.read().split()
+    return pack_values(len(lines[0]), (int(l, base=2) for l in lines))
+
+
+def get_column_counts(packed):
+    # Number of ones in each column, most significant bit first: the whole
+    # array is seen as a single big int and a mask selects bit i of every
+    # value at once
+    values = packed.values
+    data = int.from_bytes(values.tobytes(), sys.byteorder)
+    counts = []
+    for i in reversed(range(packed.nb_bits)):
+        item = (1 << i).to_bytes(values.itemsize, sys.byteorder)
+        mask = int.from_bytes(item * len(values), sys.byteorder)
+        counts.append((data & mask).bit_count())
+    return counts
+
+
+def get_power_consumption_packed(packed):
+    gamma = 0
+    n = len(packed.values)
+    for count in get_column_counts(packed):
+        gamma = (gamma << 1) | (2 * count >= n)
+    epsilon = gamma ^ ((1 << packed.nb_bits) - 1)
+    return gamma * epsilon
+
+
+def apply_bit_criteria_packed(packed, keep_most_common):
+    # Values sharing the bits selected so far form a contiguous range of the
+    # sorted values: at each bit, the range is split with a binary search
+    values = packed.values
+    lo, hi = 0, len(values)
+    prefix = 0
+    for i in reversed(range(packed.nb_bits)):
+        if hi - lo == 1:
+            break
+        mid = bisect.bisect_left(values, prefix | (1 << i), lo, hi)
+        nb_zeros, nb_ones = mid - lo, hi - mid
+        # If all the remaining values share the same bit, none is discarded
+        if nb_ones == 0:
+            keep_ones = False
+        elif nb_zeros == 0:
+            keep_ones = True
+        else:
+            keep_ones = (nb_ones >= nb_zeros) == keep_most_common
+        if keep_ones:
+            lo, prefix = mid, prefix | (1 << i)
+        else:
+            hi = mid
+    if hi - lo != 1:
+        print("Warning: expected 1 remaining diag, got %d" % (hi - lo))
+    return values[lo]
+
+
+def get_life_support_rating_packed(packed):
+    oxygen = apply_bit_criteria_packed(packed, True)
+    co2 = apply_bit_criteria_packed(packed, False)
+    return oxygen * co2
+
+
+ReportResult = collections.namedtuple(
+    "ReportResult", ["file_path", "power_consumption", "life_support_rating"]
+)
+
+
+def analyse_report(file_path):
+    packed = get_packed_diag_from_file(file_path)
+    return ReportResult(
+        file_path,
+        get_power_consumption_packed(packed),
+        get_life_support_rating_packed(packed),
+    )
+
+
+def analyse_reports(file_paths, jobs=None):
+    # Reports are parsed and analysed in a process pool (sequentially with a
+    # single job), results are in the order of the files
+    file_paths = list(file_paths)
+    jobs = jobs or min(len(file_paths), os.cpu_count())
+    if jobs <= 1:
+        return [analyse_report(file_path) for file_path in file_paths]
+    with concurrent.futures.ProcessPoolExecutor(jobs) as executor:
+        return list(executor.map(analyse_report, file_paths))
+
+
 def run_tests():
     diag = [
         "00100",
@@ -70,15 +189,49 @@ def run_tests():
     ]
     assert get_power_consumption(diag) == 198
     assert get_life_support_rating(diag) == 230
+    packed = pack_diagnostic(diag)
+    assert get_column_counts(packed) == [7, 5, 8, 7, 5]
+    assert get_power_consumption_packed(packed) == 198
+    assert get_life_support_rating_packed(packed) == 230
+    # All the remaining values share the first bit
+    diag = ["10", "11"]
+    assert get_life_support_rating(diag) == 6
+    assert get_life_support_rating_packed(pack_diagnostic(diag)) == 6
+    # Both representations on random reports of distinct values (odd sizes:
+    # no tie for gamma)
+    rng = random.Random(0)
+    for _ in range(200):
+        nb_bits = rng.randint(1, 12)
+        nb = rng.randrange(1, min(60, 2**nb_bits) + 1, 2)
+        values = rng.sample(range(2**nb_bits), nb)
+        diag = [format(v, "0%db" % nb_bits) for v in values]
+        packed = pack_diagnostic(diag)
+        assert get_power_consumption_packed(packed) == get_power_consumption(diag)
+        assert get_life_support_rating_packed(packed) == get_life_support_rating(diag)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        file_paths = []
+        diags = [["00100", "11110", "10110"], ["10", "11", "01"]]
+        for i, diag in enumerate(diags):
+            file_path = os.path.join(tmp_dir, "report%d.txt" % i)
+            with open(file_path, "w") as f:
+                f.write("\n".join(diag))
+            file_paths.append(file_path)
+        for jobs in (1, 2):
+            results = analyse_reports(file_paths, jobs)
+            assert [r.file_path for r in results] == file_paths
+            assert [r.power_consumption for r in results] == [
+                get_power_consumption(diag) for diag in diags
+            ]
+            assert [r.life_support_rating for r in results] == [
+                get_life_support_rating(diag) for diag in diags
+            ]
 
 
 def get_solutions():
-    diag = get_diag_from_file()
-    print(get_power_consumption(diag))
-    print(get_life_support_rating(diag))
-    diag = get_diag_from_file("day3_input2.txt")
-    print(get_power_consumption(diag))
-    print(get_life_support_rating(diag))
+    # Inputs are too small to be worth a process pool
+    for result in analyse_reports(["day3_input.txt", "day3_input2.txt"], jobs=1):
+        print(result.power_consumption)
+        print(result.life_support_rating)
 
 
 if __name__ == "__main__":
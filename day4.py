@@ -1,7 +1,13 @@
 # vi: set shiftwidth=4 tabstop=4 expandtab:
 import datetime
+import array
+import random
 
+import backends
+import parse_cache
 
+
+@parse_cache.cached_parser
 def get_bingo_from_file(file_path="day4_input.txt"):
     with open(file_path) as f:
         lines = [l.strip() for l in f]
@@ -10,8 +16,9 @@ def get_bingo_from_file(file_path="day4_input.txt"):
         grid = []
         for line in lines[1:]:
             if line:
+                if not grid:
+                    grids.append(grid)
                 grid.append([int(n) for n in line.split()])
-                grids.append(grid)
             else:
                 grid = []
         return numbers, grids
@@ -39,16 +46,106 @@ def play_bingo(bingo):
                         break
 
 
+def play_bingo_indexed(bingo):
+    # Same scores, in the same order, as play_bingo: each number drawn only
+    # updates the hit counters of the rows and columns containing it and the
+    # sums of unmarked numbers of the corresponding grids
+    numbers, grids = bingo
+    height = len(grids[0]) if grids else 0
+    width = len(grids[0][0]) if grids else 0
+    assert all(len(grid) == height for grid in grids)
+    assert all(len(line) == width for grid in grids for line in grid)
+    index = dict()  # number -> [(grid number, row, column)]
+    for gn, grid in enumerate(grids):
+        for i, line in enumerate(grid):
+            for j, n in enumerate(line):
+                index.setdefault(n, []).append((gn, gn * height + i, gn * width + j))
+    row_hits = array.array("i", [0]) * (len(grids) * height)
+    col_hits = array.array("i", [0]) * (len(grids) * width)
+    unmarked = [sum(n for line in grid for n in line) for grid in grids]
+    won = [False] * len(grids)
+    numbers_seen = set()
+    for number in numbers:
+        if number in numbers_seen:
+            continue
+        numbers_seen.add(number)
+        for gn, row, col in index.get(number, []):
+            if won[gn]:
+                continue
+            unmarked[gn] -= number
+            row_hits[row] += 1
+            col_hits[col] += 1
+            if row_hits[row] == width or col_hits[col] == height:
+                won[gn] = True
+                yield unmarked[gn] * number
+
+
+def play_bingo_numpy(bingo):
+    # Same scores, in the same order, as play_bingo: a grid wins at the turn
+    # where its first row or column is complete, which is the minimum over
+    # rows and columns of the maximum turn at which their numbers are drawn
+    np = backends.numpy
+    numbers, grids = bingo
+    if not grids:
+        return
+    numbers = np.array(numbers, dtype=np.int64)
+    grids = np.array(grids, dtype=np.int64)
+    never = len(numbers)
+    # Turn at which each number is drawn for the first time
+    drawn, first_turn = np.unique(numbers, return_index=True)
+    pos = np.minimum(np.searchsorted(drawn, grids), max(len(drawn) - 1, 0))
+    if len(drawn):
+        turns = np.where(drawn[pos] == grids, first_turn[pos], never)
+    else:
+        turns = np.full(grids.shape, never)
+    win_turns = np.minimum(turns.max(axis=2).min(axis=1), turns.max(axis=1).min(axis=1))
+    winners = np.flatnonzero(win_turns < never)
+    winners = winners[np.argsort(win_turns[winners], kind="stable")]
+    win_turns = win_turns[winners]
+    unmarked = np.where(turns[winners] > win_turns[:, None, None], grids[winners], 0)
+    scores = unmarked.sum(axis=(1, 2)) * numbers[win_turns]
+    for score in scores:
+        yield int(score)
+
+
+def get_bingo_scores(bingo, backend=None):
+    if backends.get(backend) == "numpy":
+        return play_bingo_numpy(bingo)
+    return play_bingo_indexed(bingo)
+
+
+def get_random_bingo(rng, nb_grids, size=5, nb_numbers=100):
+    numbers = list(range(nb_numbers))
+    rng.shuffle(numbers)
+    grids = []
+    for _ in range(nb_grids):
+        values = rng.sample(range(nb_numbers), size * size)
+        grids.append([values[i : i + size] for i in range(0, size * size, size)])
+    return numbers, grids
+
+
 def run_tests():
     bingo = get_bingo_from_file("day4_example_input.txt")
     bingo_scores = list(play_bingo(bingo))
     assert bingo_scores[0] == 4512
     assert bingo_scores[-1] == 1924
+    for backend in backends.available:
+        assert list(get_bingo_scores(bingo, backend)) == bingo_scores
+    rng = random.Random(0)
+    for nb_grids in [1, 2, 10, 100]:
+        for size in [1, 2, 5]:
+            bingo = get_random_bingo(rng, nb_grids, size, 30)
+            # Numbers drawn several times or never
+            bingo2 = (rng.choices(range(30), k=20), bingo[1])
+            for b in (bingo, bingo2):
+                scores = list(play_bingo(b))
+                for backend in backends.available:
+                    assert list(get_bingo_scores(b, backend)) == scores
 
 
 def get_solutions():
     bingo = get_bingo_from_file()
-    bingo_scores = list(play_bingo(bingo))
+    bingo_scores = list(get_bingo_scores(bingo))
     print(bingo_scores[0])
     print(bingo_scores[-1])
 
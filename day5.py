@@ -1,6 +1,11 @@
 # vi: set shiftwidth=4 tabstop=4 expandtab:
 import datetime
+import bisect
 import collections
+import random
+
+import backends
+import parse_cache
 
 
 def get_point(string):
@@ -13,12 +18,13 @@ def get_vent(string):
     return get_point(left), get_point(right)
 
 
+@parse_cache.cached_parser
 def get_vents_from_file(file_path="day5_input.txt"):
     with open(file_path) as f:
         return [get_vent(l) for l in f]
 
 
-def get_lines_overlaps(lines, diagonals=False):
+def get_lines_overlaps_counter(lines, diagonals=False):
     paths = collections.Counter()
     for (x1, y1), (x2, y2) in lines:
         dx, dy = x2 - x1, y2 - y1
@@ -31,13 +37,255 @@ def get_lines_overlaps(lines, diagonals=False):
         elif diagonals and absdx == absdy:
             steps = absdx
         if steps is not None:
+            sx, sy = (dx > 0) - (dx < 0), (dy > 0) - (dy < 0)
             for s in range(steps + 1):
-                x = x1 + s * dx / steps
-                y = y1 + s * dy / steps
-                paths[(x, y)] += 1
+                paths[(x1 + s * sx, y1 + s * sy)] += 1
     return sum(val > 1 for val in paths.values())
 
 
+# Sweep-line engine: segments belong to one of 4 families of parallel lines,
+# each line being c = a1 * x + a2 * y for the coefficients of the family,
+# and points on a line being located by a coordinate t (x, or y for vertical
+# lines)
+HOR, VER, DIAG_UP, DIAG_DOWN = range(4)
+COEFFS = [(0, 1), (1, 0), (1, -1), (1, 1)]
+
+
+def get_line_coord(family, x, y):
+    a1, a2 = COEFFS[family]
+    return a1 * x + a2 * y
+
+
+def get_pos_coord(family, x, y):
+    return y if family == VER else x
+
+
+def get_segment(line, diagonals):
+    # (family, c, t1, t2) with t1 <= t2, None for ignored lines
+    (x1, y1), (x2, y2) = line
+    dx, dy = x2 - x1, y2 - y1
+    if dy == 0:
+        family = HOR
+    elif dx == 0:
+        family = VER
+    elif diagonals and dx == dy:
+        family = DIAG_UP
+    elif diagonals and dx == -dy:
+        family = DIAG_DOWN
+    else:
+        return None
+    t1, t2 = sorted((get_pos_coord(family, x1, y1), get_pos_coord(family, x2, y2)))
+    return family, get_line_coord(family, x1, y1), t1, t2
+
+
+def get_segments(lines, diagonals):
+    segments = (get_segment(line, diagonals) for line in lines)
+    return [s for s in segments if s is not None]
+
+
+def get_point_from_coords(family, c, t):
+    if family == HOR:
+        return t, c
+    if family == VER:
+        return c, t
+    if family == DIAG_UP:
+        return t, t - c
+    return t, c - t
+
+
+def get_bounding_box(segments):
+    points = [
+        get_point_from_coords(family, c, t)
+        for family, c, t1, t2 in segments
+        for t in (t1, t2)
+    ]
+    xs, ys = zip(*points)
+    return (min(xs), min(ys)), (max(xs), max(ys))
+
+
+def get_coverage(intervals):
+    # Intervals [t1, t2] on a line -> (covered at least once, at least twice)
+    # as sorted lists of disjoint intervals
+    events = sorted(
+        [(t1, 1) for t1, _ in intervals] + [(t2 + 1, -1) for _, t2 in intervals]
+    )
+    union, multi = [], []
+    count = 0
+    for t, delta in events:
+        prev = count
+        count += delta
+        for res, threshold in ((union, 1), (multi, 2)):
+            if prev < threshold <= count:
+                res.append([t, None])
+            elif count < threshold <= prev:
+                res[-1][1] = t - 1
+    # Intervals ending where another one begins are merged
+    merged = tuple([] for _ in range(2))
+    for res, m in zip((union, multi), merged):
+        for t1, t2 in res:
+            if m and m[-1][1] + 1 == t1:
+                m[-1][1] = t2
+            else:
+                m.append([t1, t2])
+    return merged
+
+
+def get_crossings(segments_a, segments_b, family_a, family_b):
+    # Points on a segment of family a and on a segment of family b
+    # Sweep in the (c_b, c_a) plane: segments of family a are horizontal
+    # (c_a is constant, c_b varies along the segment) and segments of family b
+    # are vertical
+    def get_range(family, c, t1, t2, other_family):
+        p1 = get_point_from_coords(family, c, t1)
+        p2 = get_point_from_coords(family, c, t2)
+        return sorted(get_line_coord(other_family, *p) for p in (p1, p2))
+
+    events = []
+    for c, t1, t2 in segments_a:
+        lo, hi = get_range(family_a, c, t1, t2, family_b)
+        events.append((lo, 0, c))
+        events.append((hi, 2, c))
+    for c, t1, t2 in segments_b:
+        lo, hi = get_range(family_b, c, t1, t2, family_a)
+        events.append((c, 1, (lo, hi)))
+    events.sort()
+    (a1, a2), (b1, b2) = COEFFS[family_a], COEFFS[family_b]
+    det = a1 * b2 - a2 * b1
+    active = []  # sorted c_a of the active segments of family a
+    for cb, kind, val in events:
+        if kind == 0:
+            bisect.insort(active, val)
+        elif kind == 2:
+            del active[bisect.bisect_left(active, val)]
+        else:
+            lo, hi = val
+            for ca in active[
+                bisect.bisect_left(active, lo) : bisect.bisect_right(active, hi)
+            ]:
+                # Cramer's rule: lines may cross between integer points
+                x, rx = divmod(ca * b2 - a2 * cb, det)
+                y, ry = divmod(a1 * cb - ca * b1, det)
+                if rx == 0 and ry == 0:
+                    yield x, y
+
+
+def is_in_intervals(intervals, t):
+    # intervals: (sorted starts, corresponding ends)
+    starts, ends = intervals
+    i = bisect.bisect_right(starts, t) - 1
+    return i >= 0 and t <= ends[i]
+
+
+def get_lines_overlaps_sweep(lines, diagonals=False):
+    # Points covered at least twice are either covered twice by segments of
+    # the same line (multi-intervals of the line) or at the crossing of lines
+    # from different families
+    lines_intervals = collections.defaultdict(list)
+    for family, c, t1, t2 in get_segments(lines, diagonals):
+        lines_intervals[family, c].append((t1, t2))
+    unions = collections.defaultdict(list)  # family -> [(c, t1, t2)]
+    multis = dict()  # (family, c) -> (starts, ends)
+    nb_overlaps = 0
+    for (family, c), intervals in lines_intervals.items():
+        union, multi = get_coverage(intervals)
+        unions[family].extend((c, t1, t2) for t1, t2 in union)
+        if multi:
+            multis[family, c] = ([t1 for t1, _ in multi], [t2 for _, t2 in multi])
+            nb_overlaps += sum(t2 - t1 + 1 for t1, t2 in multi)
+    crossings = set()
+    families = sorted(unions)
+    for i, family_a in enumerate(families):
+        for family_b in families[i + 1 :]:
+            crossings.update(
+                get_crossings(unions[family_a], unions[family_b], family_a, family_b)
+            )
+    # Crossing points are counted once: they may already have been counted
+    # as part of multi-intervals, once per family for which it is the case
+    for x, y in crossings:
+        nb_counted = sum(
+            is_in_intervals(
+                multis[family, get_line_coord(family, x, y)],
+                get_pos_coord(family, x, y),
+            )
+            for family in families
+            if (family, get_line_coord(family, x, y)) in multis
+        )
+        nb_overlaps += 1 - nb_counted
+    return nb_overlaps
+
+
+def get_lines_overlaps_raster(lines, diagonals=False):
+    # Lines are drawn on a dense grid covering their bounding box
+    np = backends.numpy
+    segments = get_segments(lines, diagonals)
+    if not segments:
+        return 0
+    (x0, y0), (x1, y1) = get_bounding_box(segments)
+    grid = np.zeros((y1 - y0 + 1, x1 - x0 + 1), dtype=np.uint16)
+    diag_xs, diag_ys = [], []
+    for family, c, t1, t2 in segments:
+        if family == HOR:
+            grid[c - y0, t1 - x0 : t2 - x0 + 1] += 1
+        elif family == VER:
+            grid[t1 - y0 : t2 - y0 + 1, c - x0] += 1
+        else:
+            xs = np.arange(t1, t2 + 1)
+            diag_xs.append(xs)
+            diag_ys.append(xs - c if family == DIAG_UP else c - xs)
+    if diag_xs:
+        # Points may appear several times: increments are not buffered
+        np.add.at(grid, (np.concatenate(diag_ys) - y0, np.concatenate(diag_xs) - x0), 1)
+    return int(np.count_nonzero(grid > 1))
+
+
+# The dense grid is used when it is not much larger than the total length
+# of the lines (and not too large anyway)
+raster_max_ratio = 16
+raster_max_size = 1 << 24
+
+
+METHODS = ["counter", "sweep"] + (["raster"] if backends.numpy is not None else [])
+
+
+def choose_method(lines, diagonals=False, backend=None):
+    if backends.get(backend) != "numpy":
+        return "sweep"
+    segments = get_segments(lines, diagonals)
+    if not segments:
+        return "sweep"
+    (x0, y0), (x1, y1) = get_bounding_box(segments)
+    size = (x1 - x0 + 1) * (y1 - y0 + 1)
+    length = sum(t2 - t1 + 1 for _, _, t1, t2 in segments)
+    if size <= raster_max_size and size <= raster_max_ratio * length:
+        return "raster"
+    return "sweep"
+
+
+def get_lines_overlaps(lines, diagonals=False, method=None, backend=None):
+    # Sweep-line engine by default, dense grid (NumPy backend) when it is
+    # worth it
+    method = method or choose_method(lines, diagonals, backend)
+    if method == "counter":
+        return get_lines_overlaps_counter(lines, diagonals)
+    if method == "raster":
+        return get_lines_overlaps_raster(lines, diagonals)
+    assert method == "sweep"
+    return get_lines_overlaps_sweep(lines, diagonals)
+
+
+def get_random_vents(rng, nb, size, diagonals=True):
+    vents = []
+    while len(vents) < nb:
+        x1, y1 = rng.randrange(size), rng.randrange(size)
+        dx, dy = rng.choice(
+            [(1, 0), (0, 1), (1, 1), (1, -1)] if diagonals else [(1, 0), (0, 1)]
+        )
+        length = rng.randrange(-size, size)
+        x2, y2 = x1 + length * dx, y1 + length * dy
+        vents.append(((x1, y1), (x2, y2)))
+    return vents
+
+
 def run_tests():
     vents = [
         "0,9 -> 5,9",
@@ -54,6 +302,45 @@ def run_tests():
     vents = [get_vent(s) for s in vents]
     assert get_lines_overlaps(vents) == 5
     assert get_lines_overlaps(vents, True) == 12
+    for method in METHODS:
+        assert get_lines_overlaps(vents, method=method) == 5
+        assert get_lines_overlaps(vents, True, method) == 12
+    # Coordinates in the millions
+    vents = [
+        ((0, 0), (3000000, 0)),
+        ((1000000, 0), (2000000, 0)),
+        ((1500000, -5), (1500000, 5)),
+        ((1499999, -1), (1500001, 1)),
+        ((2999999, 1), (3000001, -1)),
+    ]
+    assert get_lines_overlaps(vents) == 1000001
+    assert get_lines_overlaps(vents, True) == 1000002
+    for backend in backends.available:
+        assert choose_method(vents, True, backend) == "sweep"
+        assert get_lines_overlaps(vents, True, backend=backend) == 1000002
+    # Dense grid only with the NumPy backend, when the bounding box is not
+    # much larger than the total length of the lines
+    dense = [((0, y), (99, y)) for y in range(10)]
+    dense += [((0, 0), (0, 9)), ((0, 0), (9, 9))]
+    sparse = [((0, 0), (9, 0)), ((500, 500), (500, 509))]
+    assert choose_method(dense, True, "python") == "sweep"
+    if "numpy" in backends.available:
+        assert choose_method(dense, True, "numpy") == "raster"
+        assert choose_method(dense, False, "numpy") == "raster"
+        assert choose_method(sparse, True, "numpy") == "sweep"
+    for backend in backends.available:
+        assert get_lines_overlaps(dense, backend=backend) == 10
+        assert get_lines_overlaps(dense, True, backend=backend) == 19
+        assert get_lines_overlaps(sparse, True, backend=backend) == 0
+    rng = random.Random(0)
+    for _ in range(300):
+        for diagonals in (False, True):
+            vents = get_random_vents(rng, rng.randint(1, 30), rng.randint(1, 15))
+            expected = get_lines_overlaps(vents, diagonals, "counter")
+            for backend in backends.available:
+                assert get_lines_overlaps(vents, diagonals, backend=backend) == expected
+            for method in METHODS:
+                assert get_lines_overlaps(vents, diagonals, method) == expected
 
 
 def get_solutions():
@@ -2,8 +2,13 @@
 import datetime
 import functools
 import collections
+import random
 
+import linear_recurrence
+import parse_cache
 
+
+@parse_cache.cached_parser
 def get_fishes_from_file(file_path="day6_input.txt"):
     with open(file_path) as f:
         for l in f:
@@ -17,9 +22,43 @@ def one_generation(fishes):
 
 
 def n_generations(fishes, n):
-    for _ in range(n):
-        fishes = one_generation(fishes)
-    return fishes
+    return list(n_generations_bytes(fishes, n))
+
+
+def n_generations_bytes(fishes, n):
+    # Same sequence as one_generation applied n times, with one byte per fish
+    # in a bytearray which is only ever extended: after k generations, an
+    # adult stored as b has timer (b - k) % 7 so that decrementing all timers
+    # is just incrementing k. Fishes born during the last 2 generations are
+    # at the end of the array: a fish born at generation s is stored as
+    # (s + 1) % 7 and has timer (b - k) % 7 + 7 until it becomes an adult
+    assert all(0 <= f <= 8 for f in fishes)
+    # Initial fishes with timers 7 and 8 are stored the same way but among
+    # the adults: they must not be counted as spawners while they are young
+    population = bytearray(f % 7 for f in fishes)
+    young = [fishes.count(7), fishes.count(8)]
+    adult_end = len(population)
+    births = collections.deque([0, 0])  # fishes born at k - 1 and at k
+    for k in range(n):
+        nb_spawners = population.count(k % 7, 0, adult_end)
+        if k < len(young):
+            nb_spawners -= young[k]
+        adult_end += births.popleft()
+        births.append(nb_spawners)
+        population.extend(bytes([(k + 2) % 7]) * nb_spawners)
+    timers = get_timers(population, adult_end, n)
+    if n < len(young):
+        for i, f in enumerate(fishes):
+            if f - n > 6:
+                timers[i] = f - n
+    return timers
+
+
+def get_timers(population, adult_end, k):
+    adult_table = bytes((b - k) % 7 for b in range(256))
+    young_table = bytes((b - k) % 7 + 7 for b in range(256))
+    adults, young = population[:adult_end], population[adult_end:]
+    return adults.translate(adult_table) + young.translate(young_table)
 
 
 def n_generations_from_count(fishes, n):
@@ -36,6 +75,26 @@ def n_generations_from_count(fishes, n):
     return sum(count.values())
 
 
+def fish_transitions(timer):
+    if timer == 0:
+        yield 6, 1
+        yield 8, 1
+    else:
+        yield timer - 1, 1
+
+
+def n_generations_from_matrix(fishes, n, method=None):
+    index, matrix = linear_recurrence.build_matrix(range(9), fish_transitions)
+    vector = linear_recurrence.get_vector(index, collections.Counter(fishes))
+    return sum(linear_recurrence.advance(matrix, vector, n, method))
+
+
+def n_generations_from_list(fishes, n):
+    for _ in range(n):
+        fishes = one_generation(fishes)
+    return fishes
+
+
 def run_tests():
     fishes1 = [3, 4, 3, 1, 2]
     fishes2 = one_generation(fishes1)
@@ -50,13 +109,25 @@ def run_tests():
     assert n_generations(fishes1, 18) == [6, 0, 6, 4, 5, 6, 0, 1, 1, 2, 6, 0, 1, 1, 1, 2, 2, 3, 3, 4, 6, 7, 8, 8, 8, 8]
     for i in range(7):
         assert len(n_generations(fishes1, i)) == n_generations_from_count(fishes1, i)
+    rng = random.Random(0)
+    for _ in range(20):
+        fishes = [rng.randint(0, 8) for _ in range(rng.randint(0, 10))]
+        for i in range(40):
+            expected = n_generations_from_list(fishes, i)
+            assert n_generations(fishes, i) == expected
+            assert n_generations_bytes(fishes, i) == bytearray(expected)
+    assert n_generations(fishes3, 2) == [6, 0, 6, 4, 5, 6, 7, 8, 8]
     assert n_generations_from_count(fishes1, 256) == 26984457539
+    for i in list(range(20)) + [80, 255, 256, 1000]:
+        count = n_generations_from_count(fishes1, i)
+        for method in ("stepping", "squaring"):
+            assert n_generations_from_matrix(fishes1, i, method) == count
 
 
 def get_solutions():
     fishes = get_fishes_from_file()
-    print(len(n_generations(fishes, 80)))
-    print(n_generations_from_count(fishes, 256))
+    print(len(n_generations_bytes(fishes, 80)))
+    print(n_generations_from_matrix(fishes, 256))
 
 
 if __name__ == "__main__":
@@ -1,8 +1,11 @@
 # vi: set shiftwidth=4 tabstop=4 expandtab:
 import datetime
-import math
+import random
 
+import parse_cache
 
+
+@parse_cache.cached_parser
 def get_crabs_from_file(file_path="day7_input.txt"):
     with open(file_path) as f:
         for l in f:
@@ -26,34 +29,118 @@ def min_cost(crabs, func, positions_to_consider):
     return min(cost(crabs, p, func) for p in positions_to_consider)
 
 
+def get_histogram(crabs):
+    # Number of crabs at each position from the leftmost crab
+    left = min(crabs)
+    counts = [0] * (max(crabs) - left + 1)
+    for crab in crabs:
+        counts[crab - left] += 1
+    return left, counts
+
+
+def get_median(left, counts):
+    n = sum(counts)
+    nb_left = 0
+    for i, nb in enumerate(counts):
+        nb_left += nb
+        if 2 * nb_left >= n:
+            return left + i
+
+
+def get_cost_curves(crabs):
+    # Costs with dist1 and with dist2 of each position between the leftmost
+    # and the rightmost crab, from the number and the sum of the positions of
+    # the crabs on the left and on the right:
+    #   cost1(p) = (p * n_left - s_left) + (s_right - p * n_right)
+    # and, as dist2(d) = (d² + d) / 2 with the sum of d² expanded:
+    #   cost2(p) = (n * p² - 2 * p * s + q + cost1(p)) / 2
+    left, counts = get_histogram(crabs)
+    positions = range(left, left + len(counts))
+    n = sum(counts)
+    s = sum(nb * p for p, nb in zip(positions, counts))
+    q = sum(nb * p * p for p, nb in zip(positions, counts))
+    nb_left, sum_left = 0, 0  # crabs at positions <= p
+    curve1, curve2 = [], []
+    for p, nb in zip(positions, counts):
+        nb_left += nb
+        sum_left += nb * p
+        cost1 = (p * nb_left - sum_left) + (s - sum_left - p * (n - nb_left))
+        curve1.append(cost1)
+        curve2.append((n * p * p - 2 * p * s + q + cost1) // 2)
+    return left, curve1, curve2
+
+
 def get_best_position_dist1(crabs):
-    crabs = sorted(crabs)
-    n = len(crabs)
-    # Get cost around median position
-    positions = (crabs[n // 2], crabs[(n + 1) // 2])
-    return min_cost(crabs, dist1, positions)
+    # Cost is minimal at the median position
+    median = get_median(*get_histogram(crabs))
+    return cost(crabs, median, dist1)
+
+
+def get_histogram_cost(left, counts, pos, func):
+    return sum(nb * func(pos, left + i) for i, nb in enumerate(counts) if nb)
+
+
+def get_min_cost_search(crabs, func):
+    # For any convex cost function (of the position, for each crab) which is
+    # minimal between the leftmost and the rightmost crab, the total cost is
+    # convex as well: its minimum is at the first position where it stops
+    # decreasing, found with a binary search on the discrete derivative
+    left, counts = get_histogram(crabs)
+    lo, hi = left, left + len(counts) - 1
+    while lo < hi:
+        mid = (lo + hi) // 2
+        c1 = get_histogram_cost(left, counts, mid, func)
+        c2 = get_histogram_cost(left, counts, mid + 1, func)
+        if c2 >= c1:
+            hi = mid
+        else:
+            lo = mid + 1
+    return get_histogram_cost(left, counts, lo, func)
+
+
+def get_min_cost(crabs, func):
+    # Cost curves are cheaper for the known cost functions
+    if func is dist1:
+        return min(get_cost_curves(crabs)[1])
+    if func is dist2:
+        return min(get_cost_curves(crabs)[2])
+    return get_min_cost_search(crabs, func)
 
 
 def get_best_position_dist2(crabs):
-    # 1. Computing the minimal cost with a square cost: C = d²
-    #    can be done:
-    #       F(x) = (p1 - x)² + (p2 - x)² + ... + (pn - x)²
-    #       F(x) = nx² - 2x(p1 + p2 + ... + pn) + (p1² + p2² + ... + pn²)
-    #       F²(x) = 2nx - 2(p1 + p2 + ... + pn)
-    #       F'(x) = 0 <=> x = (p1 + ... + pn) / n
-    #
-    # 2. Moving d cost C = (d+1)*d/2 which is slightly trickier to
-    #    optimise as it involves computing absolute values.
-    # 3. Using the best solution for problem 1 works for problem 2 but I don't know why
-    avg = sum(crabs) / len(crabs)
-    positions = (math.floor(avg), math.ceil(avg))
-    return min_cost(crabs, dist2, positions)
+    return get_min_cost(crabs, dist2)
 
 
 def run_tests():
     crabs = [16, 1, 2, 0, 4, 2, 7, 1, 2, 14]
     assert get_best_position_dist1(crabs) == 37
     assert get_best_position_dist2(crabs) == 168
+    left, curve1, curve2 = get_cost_curves(crabs)
+    assert left == 0
+    assert curve1[2] == 37
+    assert curve2[5] == 168
+    rng = random.Random(0)
+    for _ in range(100):
+        crabs = [rng.randint(-20, 50) for _ in range(rng.randint(1, 20))]
+        left, curve1, curve2 = get_cost_curves(crabs)
+        assert left == min(crabs)
+        assert len(curve1) == len(curve2) == max(crabs) - left + 1
+        for i, (cost1, cost2) in enumerate(zip(curve1, curve2)):
+            assert cost1 == cost(crabs, left + i, dist1)
+            assert cost2 == cost(crabs, left + i, dist2)
+        assert get_best_position_dist1(crabs) == min(curve1)
+        assert get_best_position_dist2(crabs) == min(curve2)
+        positions = range(min(crabs), max(crabs) + 1)
+        funcs = [
+            dist1,
+            dist2,
+            lambda p, c: dist1(p, c) ** 3,
+            lambda p, c: 3 * (p - c) ** 4 + 2 * max(c - p, 0),
+        ]
+        for func in funcs:
+            expected = min_cost(crabs, func, positions)
+            assert get_min_cost_search(crabs, func) == expected
+            assert get_min_cost(crabs, func) == expected
 
 
 def get_solutions():
@@ -2,6 +2,8 @@
 import datetime
 import collections
 
+import parse_cache
+
 
 def get_signals_from_str(l, sep=" | "):
     left, mid, right = l.strip().partition(sep)
@@ -9,6 +11,7 @@ def get_signals_from_str(l, sep=" | "):
     return (left.split(), right.split())
 
 
+@parse_cache.cached_parser
 def get_signals_from_file(file_path="day8_input.txt"):
     with open(file_path) as f:
         return [get_signals_from_str(l) for l in f]
@@ -2,68 +2,62 @@
 import datetime
 import collections
 
+import grid
+import parse_cache
 
-def get_line_from_str(s):
-    return [int(d) for d in s.strip()]
+DIGITS = "0123456789"
 
 
-def get_grid_from_file(file_path="day9_input.txt"):
-    with open(file_path) as f:
-        return [get_line_from_str(l) for l in f]
-
+def get_grid_from_lines(lines):
+    return grid.Grid.from_lines((l.strip() for l in lines), DIGITS)
 
-def points(grid):
-    for x, line in enumerate(grid):
-        for y, val in enumerate(line):
-            yield x, y, val
 
-
-def neighbours(grid, x, y):
-    for dx, dy in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
-        x2, y2 = x + dx, y + dy
-        if 0 <= x2 < len(grid):
-            l = grid[x2]
-            if 0 <= y2 < len(l):
-                yield x2, y2, l[y2]
+@parse_cache.cached_parser
+def get_grid_from_file(file_path="day9_input.txt"):
+    with open(file_path) as f:
+        return get_grid_from_lines(f)
 
 
-def get_low_points(grid):
+def get_low_points(heights):
+    values = heights.values
+    neighbours = heights.neighbours_table()
     return (
-        (x, y, val)
-        for x, y, val in points(grid)
-        if all(v > val for _, _, v in neighbours(grid, x, y))
+        i
+        for i, val in enumerate(values)
+        if all(values[i2] > val for i2 in neighbours[i])
     )
 
 
-def print_point_sets(grid, points):
-    for x, line in enumerate(grid):
-        print("".join("X" if (x, y) in points else " " for y, val in enumerate(line)))
+def print_point_sets(heights, points):
+    mask = grid.Grid(heights.height, heights.width)
+    for i in points:
+        mask.values[i] = 1
+    mask.show(" X")
 
 
-def part1(grid):
-    return sum(val + 1 for x, y, val in get_low_points(grid))
+def part1(heights):
+    return sum(heights.values[i] + 1 for i in get_low_points(heights))
 
 
-def get_basin_from_low_point(grid, low_point):
+def get_basin_from_low_point(heights, low_point):
+    values = heights.values
+    neighbours = heights.neighbours_table()
     basin = set()
     queue = collections.deque([low_point])
     while queue:
-        pos = queue.popleft()
-        if pos not in basin:
-            basin.add(pos)
-            x, y = pos
-            val = grid[x][y]
-            for x2, y2, v2 in neighbours(grid, x, y):
+        i = queue.popleft()
+        if i not in basin:
+            basin.add(i)
+            val = values[i]
+            for i2 in neighbours[i]:
+                v2 = values[i2]
                 if v2 > val and v2 != 9:
-                    queue.append((x2, y2))
+                    queue.append(i2)
     return basin
 
 
-def part2(grid):
-    basins = {
-        (x, y): get_basin_from_low_point(grid, (x, y))
-        for x, y, val in get_low_points(grid)
-    }
+def part2(heights):
+    basins = {i: get_basin_from_low_point(heights, i) for i in get_low_points(heights)}
     # Additional verification that no one asked
     # "all other locations will always be part of exactly one basin"
     if False:
@@ -78,22 +72,22 @@ def part2(grid):
 
 
 def run_tests():
-    grid = [
+    lines = [
         "2199943210",
         "3987894921",
         "9856789892",
         "8767896789",
         "9899965678",
     ]
-    grid = [get_line_from_str(l) for l in grid]
-    assert part1(grid) == 15
-    assert part2(grid) == 1134
+    heights = get_grid_from_lines(lines)
+    assert part1(heights) == 15
+    assert part2(heights) == 1134
 
 
 def get_solutions():
-    grid = get_grid_from_file()
-    print(part1(grid))
-    print(part2(grid))
+    heights = get_grid_from_file()
+    print(part1(heights))
+    print(part2(heights))
 
 
 if __name__ == "__main__":
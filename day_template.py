@@ -1,7 +1,10 @@
 # vi: set shiftwidth=4 tabstop=4 expandtab:
 import datetime
 
+import parse_cache
 
+
+@parse_cache.cached_parser
 def get_xxx_from_file(file_path="dayDAYNUMBER_input.txt"):
     with open(file_path) as f:
         return [l.strip() for l in f]
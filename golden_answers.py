@@ -0,0 +1,44 @@
+# vi: set shiftwidth=4 tabstop=4 expandtab:
+import difflib
+import json
+import os
+
+repo_dir = os.path.dirname(os.path.abspath(__file__))
+golden_file = os.path.join(repo_dir, "golden_answers.json")
+
+
+def get_day_num(name):
+    return int(name[len("day") :])
+
+
+def load(file_path=golden_file):
+    # {"dayN": [lines printed by get_solutions()]}
+    try:
+        with open(file_path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return dict()
+
+
+def store(answers, file_path=golden_file):
+    # Answers of the days which were not run are kept
+    golden = load(file_path)
+    golden.update(answers)
+    golden = {name: golden[name] for name in sorted(golden, key=get_day_num)}
+    tmp_path = "%s.%d.tmp" % (file_path, os.getpid())
+    with open(tmp_path, "w") as f:
+        json.dump(golden, f, indent=4)
+        f.write("\n")
+    os.replace(tmp_path, file_path)
+
+
+def get_diff(name, expected, actual):
+    return list(
+        difflib.unified_diff(
+            expected,
+            actual,
+            "%s (golden)" % name,
+            "%s (actual)" % name,
+            lineterm="",
+        )
+    )
@@ -0,0 +1,127 @@
+# vi: set shiftwidth=4 tabstop=4 expandtab:
+import functools
+
+# Grids store one small integer per cell, row by row, in a flat bytearray:
+# cell (x, y) (line x, column y) is at index x * width + y
+
+DIRECTIONS4 = ((-1, 0), (1, 0), (0, -1), (0, 1))
+DIRECTIONS8 = tuple(
+    (dx, dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1) if (dx, dy) != (0, 0)
+)
+
+
+@functools.lru_cache(maxsize=None)
+def get_shift_table(height, width, dx, dy, wrap=False):
+    # Index of cell (x + dx, y + dy) for each cell (x, y), None if out of bounds
+    table = []
+    for x in range(height):
+        for y in range(width):
+            x2, y2 = x + dx, y + dy
+            if wrap:
+                x2, y2 = x2 % height, y2 % width
+            elif not (0 <= x2 < height and 0 <= y2 < width):
+                table.append(None)
+                continue
+            table.append(x2 * width + y2)
+    return tuple(table)
+
+
+@functools.lru_cache(maxsize=None)
+def get_neighbours_table(height, width, directions=DIRECTIONS4, wrap=False):
+    # Indices of the neighbours within bounds for each cell
+    tables = [get_shift_table(height, width, dx, dy, wrap) for dx, dy in directions]
+    return tuple(tuple(i for i in cell if i is not None) for cell in zip(*tables))
+
+
+class Grid:
+    def __init__(self, height, width, values=None, default=0):
+        self.height = height
+        self.width = width
+        if values is None:
+            values = bytes([default]) * (height * width)
+        self.values = bytearray(values)
+        assert len(self.values) == height * width
+
+    @classmethod
+    def from_lines(cls, lines, chars, default=0):
+        # Value of a character is its index in chars, lines shorter than the
+        # longest one are padded with the default value
+        conv = {c: i for i, c in enumerate(chars)}
+        lines = list(lines)
+        width = max((len(l) for l in lines), default=0)
+        values = bytearray()
+        for l in lines:
+            values.extend(conv[c] for c in l)
+            values.extend(bytes([default]) * (width - len(l)))
+        return cls(len(lines), width, values)
+
+    def __eq__(self, other):
+        return (self.height, self.width, self.values) == (
+            other.height,
+            other.width,
+            other.values,
+        )
+
+    def __len__(self):
+        return len(self.values)
+
+    def copy(self):
+        return Grid(self.height, self.width, self.values)
+
+    def index(self, x, y):
+        return x * self.width + y
+
+    def position(self, index):
+        return divmod(index, self.width)
+
+    def in_bounds(self, x, y):
+        return 0 <= x < self.height and 0 <= y < self.width
+
+    def get(self, x, y, default=None):
+        return self.values[x * self.width + y] if self.in_bounds(x, y) else default
+
+    def set(self, x, y, value):
+        assert self.in_bounds(x, y)
+        self.values[x * self.width + y] = value
+
+    def count(self, value):
+        return self.values.count(value)
+
+    def positions(self, value=None):
+        # (index, x, y) of the cells, optionally only those with a given value
+        width = self.width
+        for i, v in enumerate(self.values):
+            if value is None or v == value:
+                yield (i, *divmod(i, width))
+
+    def rows(self):
+        width = self.width
+        for i in range(0, len(self.values), width):
+            yield self.values[i : i + width]
+
+    def shift_table(self, dx, dy, wrap=False):
+        return get_shift_table(self.height, self.width, dx, dy, wrap)
+
+    def neighbours_table(self, diagonals=False, wrap=False):
+        directions = DIRECTIONS8 if diagonals else DIRECTIONS4
+        return get_neighbours_table(self.height, self.width, directions, wrap)
+
+    def pad(self, border, value=0):
+        width = self.width + 2 * border
+        grid = Grid(self.height + 2 * border, width, default=value)
+        for x, row in enumerate(self.rows(), start=border):
+            grid.values[x * width + border : x * width + border + self.width] = row
+        return grid
+
+    def render(self, chars):
+        # Value v is rendered as chars[v]
+        table = bytearray(range(256))
+        table[: len(chars)] = chars.encode()
+        text = self.values.translate(table).decode()
+        return "\n".join(
+            text[i : i + self.width] for i in range(0, len(text), self.width)
+        )
+
+    def show(self, chars):
+        print(self.render(chars))
+        print()
@@ -0,0 +1,542 @@
+# vi: set shiftwidth=4 tabstop=4 expandtab:
+import argparse
+import itertools
+import random
+import sys
+
+# Seeded generators of synthetic inputs in the format of each day
+# generate_dayN(size, rng) returns the content of an input file, "size"
+# being the natural scaling parameter for the day (documented for each one)
+
+
+def lines_to_str(lines):
+    return "".join(l + "\n" for l in lines)
+
+
+def digit_grid(size, rng, digits="0123456789"):
+    return ["".join(rng.choice(digits) for _ in range(size)) for _ in range(size)]
+
+
+# Day 1: number of depths
+def generate_day1(size, rng):
+    depth, depths = rng.randint(100, 200), []
+    for _ in range(size):
+        depth = max(0, depth + rng.randint(-10, 15))
+        depths.append(str(depth))
+    return lines_to_str(depths)
+
+
+# Day 2: number of commands
+def generate_day2(size, rng):
+    commands = ("forward", "down", "up")
+    weights = (4, 3, 2)
+    return lines_to_str(
+        "%s %d" % (rng.choices(commands, weights)[0], rng.randint(1, 9))
+        for _ in range(size)
+    )
+
+
+# Day 3: number of (distinct) diagnostic lines
+def generate_day3(size, rng):
+    nb_bits = max(12, size.bit_length() + 2)
+    values = rng.sample(range(2**nb_bits), size)
+    return lines_to_str(bin(v)[2:].zfill(nb_bits) for v in values)
+
+
+# Day 4: number of bingo boards
+def generate_day4(size, rng):
+    numbers = list(range(100))
+    rng.shuffle(numbers)
+    lines = [",".join(str(n) for n in numbers)]
+    for _ in range(size):
+        board = rng.sample(range(100), 25)
+        lines.append("")
+        for i in range(0, 25, 5):
+            lines.append(" ".join("%2d" % n for n in board[i : i + 5]))
+    return lines_to_str(lines)
+
+
+# Day 5: number of vent lines
+def generate_day5(size, rng, max_coord=1000):
+    lines = []
+    while len(lines) < size:
+        x1, y1 = rng.randrange(max_coord), rng.randrange(max_coord)
+        kind = rng.choice("hvd")
+        dx = 0 if kind == "v" else rng.choice((-1, 1))
+        dy = 0 if kind == "h" else rng.choice((-1, 1))
+        # Longest line in that direction staying in the area
+        max_length = min(
+            (c if d < 0 else max_coord - 1 - c) if d else max_coord
+            for c, d in ((x1, dx), (y1, dy))
+        )
+        if max_length == 0:
+            continue
+        length = rng.randint(1, max_length)
+        lines.append("%d,%d -> %d,%d" % (x1, y1, x1 + dx * length, y1 + dy * length))
+    return lines_to_str(lines)
+
+
+# Day 6: number of lanternfishes
+def generate_day6(size, rng):
+    return ",".join(str(rng.randint(1, 5)) for _ in range(size)) + "\n"
+
+
+# Day 7: number of crabs
+def generate_day7(size, rng):
+    spread = max(10, size // 2)
+    return ",".join(str(int(rng.expovariate(1 / spread))) for _ in range(size)) + "\n"
+
+
+# Day 8: number of displays
+DIGITS_SEGMENTS = [
+    "abcefg",
+    "cf",
+    "acdeg",
+    "acdfg",
+    "bcdf",
+    "abdfg",
+    "abdefg",
+    "acf",
+    "abcdefg",
+    "abcdfg",
+]
+
+
+def generate_day8(size, rng):
+    lines = []
+    for _ in range(size):
+        wiring = dict(zip("abcdefg", rng.sample("abcdefg", 7)))
+
+        def signal(digit):
+            letters = [wiring[c] for c in DIGITS_SEGMENTS[digit]]
+            rng.shuffle(letters)
+            return "".join(letters)
+
+        patterns = [signal(d) for d in rng.sample(range(10), 10)]
+        output = [signal(rng.randrange(10)) for _ in range(4)]
+        lines.append("%s | %s" % (" ".join(patterns), " ".join(output)))
+    return lines_to_str(lines)
+
+
+# Day 9: side of the (square) heightmap
+def generate_day9(size, rng):
+    # Ridges of 9s delimit the basins, like in the actual input
+    grid = [[rng.choice("012345678") for _ in range(size)] for _ in range(size)]
+    for _ in range(max(1, size // 4)):
+        if rng.random() < 0.5:
+            x = rng.randrange(size)
+            for y in range(size):
+                grid[x][y] = "9"
+        else:
+            y = rng.randrange(size)
+            for x in range(size):
+                grid[x][y] = "9"
+    return lines_to_str("".join(line) for line in grid)
+
+
+# Day 10: number of navigation lines
+def generate_day10(size, rng, length=100):
+    pairs = {"(": ")", "[": "]", "{": "}", "<": ">"}
+    lines = []
+    for i in range(size):
+        line, stack = [], []
+        for _ in range(length):
+            if stack and rng.random() < 0.45:
+                line.append(stack.pop())
+            else:
+                c = rng.choice("([{<")
+                line.append(c)
+                stack.append(pairs[c])
+        # About half the lines are corrupted, the other ones are incomplete
+        if stack and i % 2 == 0:
+            line.append(rng.choice([c for c in ")]}>" if c != stack[-1]]))
+        elif not stack:
+            line.append(rng.choice("([{<"))
+        lines.append("".join(line))
+    return lines_to_str(lines)
+
+
+# Day 11: side of the (square) octopus grid
+def octopuses_synchronize(lines, max_steps):
+    size = len(lines)
+    energy = [int(c) for line in lines for c in line]
+    for _ in range(max_steps):
+        if not any(energy):
+            return True
+        to_flash = []
+        for i in range(len(energy)):
+            energy[i] += 1
+            if energy[i] == 10:
+                to_flash.append(i)
+        flashed = set(to_flash)
+        while to_flash:
+            x, y = divmod(to_flash.pop(), size)
+            for x2 in range(max(0, x - 1), min(size, x + 2)):
+                for y2 in range(max(0, y - 1), min(size, y + 2)):
+                    j = x2 * size + y2
+                    energy[j] += 1
+                    if energy[j] >= 10 and j not in flashed:
+                        flashed.add(j)
+                        to_flash.append(j)
+        for i in flashed:
+            energy[i] = 0
+    return False
+
+
+def generate_day11(size, rng):
+    # Random grids seldom synchronize (first_synchro would loop forever):
+    # grids are drawn until one does, high values making it more likely
+    while True:
+        lines = digit_grid(size, rng, "456789")
+        if octopuses_synchronize(lines, 1000):
+            return lines_to_str(lines)
+
+
+# Day 12: number of small caves
+def generate_day12(size, rng):
+    # Big caves are never connected to each other (there would be infinitely
+    # many paths) and the graph stays sparse: the number of paths grows
+    # exponentially anyway
+    small = ["start", "end"] + ["c%d" % i for i in range(size)]
+    big = ["X%d" % i for i in range(max(1, size // 4))]
+    edges = set()
+    for i, cave in enumerate(small):
+        if i:
+            edges.add((small[rng.randrange(i)], cave))
+    for cave in big:
+        for other in rng.sample(small, min(3, len(small))):
+            edges.add((cave, other))
+    return lines_to_str("%s-%s" % e for e in sorted(edges))
+
+
+# Day 13: number of dots
+def generate_day13(size, rng, nb_folds=12, width=40, height=6):
+    # Dots are built on the final (folded) paper and unfolded randomly so
+    # that no dot lies on a fold line
+    folds = []
+    for i in range(nb_folds):
+        if i % 2 == 0:
+            folds.append(("x", width))
+            width = 2 * width + 1
+        else:
+            folds.append(("y", height))
+            height = 2 * height + 1
+    folds.reverse()
+    dots = set()
+    while len(dots) < size:
+        x, y = rng.randrange(40), rng.randrange(6)
+        for axis, line in reversed(folds):
+            if rng.random() < 0.5:
+                if axis == "x":
+                    x = 2 * line - x
+                else:
+                    y = 2 * line - y
+        dots.add((x, y))
+    lines = ["%d,%d" % d for d in sorted(dots)]
+    lines.append("")
+    lines.extend("fold along %s=%d" % f for f in folds)
+    return lines_to_str(lines)
+
+
+# Day 14: length of the polymer template
+def generate_day14(size, rng, letters="BCFHKNOPSV"):
+    lines = ["".join(rng.choice(letters) for _ in range(size)), ""]
+    for a, b in itertools.product(letters, repeat=2):
+        lines.append("%s%s -> %s" % (a, b, rng.choice(letters)))
+    return lines_to_str(lines)
+
+
+# Day 15: side of the (square) risk level map
+def generate_day15(size, rng):
+    return lines_to_str(digit_grid(size, rng, "123456789"))
+
+
+# Day 16: number of literal values in the transmission
+def packet_bits(nb_literals, rng, comparison=True):
+    version = "{:03b}".format(rng.randrange(8))
+    if nb_literals == 1:
+        value = "{:b}".format(rng.randrange(1 << rng.randint(1, 16)))
+        value = value.zfill(-(-len(value) // 4) * 4)
+        groups = [value[i : i + 4] for i in range(0, len(value), 4)]
+        return (
+            version
+            + "100"
+            + "".join(
+                ("1" if i < len(groups) - 1 else "0") + g for i, g in enumerate(groups)
+            )
+        )
+    if comparison and nb_literals == 2 and rng.random() < 0.5:
+        type_id = rng.choice((5, 6, 7))
+        sizes = [1, 1]
+    else:
+        type_id = rng.choice((0, 1, 2, 3))
+        nb_sub = rng.randint(2, min(8, nb_literals))
+        cuts = sorted(rng.sample(range(1, nb_literals), nb_sub - 1))
+        sizes = [b - a for a, b in zip([0] + cuts, cuts + [nb_literals])]
+    sub_packets = "".join(packet_bits(n, rng) for n in sizes)
+    type_bits = "{:03b}".format(type_id)
+    if len(sub_packets) < (1 << 15) and rng.random() < 0.5:
+        return (
+            version + type_bits + "0" + "{:015b}".format(len(sub_packets)) + sub_packets
+        )
+    return version + type_bits + "1" + "{:011b}".format(len(sizes)) + sub_packets
+
+
+def generate_day16(size, rng):
+    # Outermost packet evaluates to a number, not to a comparison result
+    bits = packet_bits(size, rng, comparison=False)
+    bits += "0" * (-len(bits) % 8)
+    return "%0*X\n" % (len(bits) // 4, int(bits, 2))
+
+
+# Day 17: width of the target area
+def generate_day17(size, rng):
+    x_min = rng.randint(2 * size, 3 * size)
+    y_max = -rng.randint(2 * size, 3 * size)
+    return "target area: x=%d..%d, y=%d..%d\n" % (
+        x_min,
+        x_min + size,
+        y_max - size,
+        y_max,
+    )
+
+
+# Day 18: number of snailfish numbers
+def snailfish_number(rng, depth=1):
+    if depth > 4 or (depth > 1 and rng.random() < 0.3):
+        return str(rng.randrange(10))
+    return "[%s,%s]" % (
+        snailfish_number(rng, depth + 1),
+        snailfish_number(rng, depth + 1),
+    )
+
+
+def generate_day18(size, rng):
+    return lines_to_str(snailfish_number(rng) for _ in range(size))
+
+
+# Day 19: number of scanners
+def get_proper_rotations():
+    # The 24 rotations: permutations of the axes with sign changes and determinant 1
+    for perm in itertools.permutations(range(3)):
+        parity = sum(perm[i] > perm[j] for i in range(3) for j in range(i + 1, 3)) % 2
+        for signs in itertools.product((-1, 1), repeat=3):
+            if (signs[0] * signs[1] * signs[2]) * (-1 if parity else 1) == 1:
+                yield lambda p, perm=perm, signs=signs: tuple(
+                    s * p[i] for s, i in zip(signs, perm)
+                )
+
+
+def generate_day19(size, rng, detection_range=1000, nb_common=12):
+    # Scanners form a chain along the x axis, consecutive scanners sharing
+    # beacons in the region they both detect
+    rotations = list(get_proper_rotations())
+    scanners = [(0, 0, 0)]
+    for _ in range(size - 1):
+        x, y, z = scanners[-1]
+        scanners.append(
+            (
+                x + rng.randint(1100, 1300),
+                y + rng.randint(-100, 100),
+                z + rng.randint(-100, 100),
+            )
+        )
+
+    def random_point(low, high):
+        return tuple(rng.randint(l, h) for l, h in zip(low, high))
+
+    beacons = set()
+    for s1, s2 in zip(scanners, scanners[1:]):
+        low = [max(c1, c2) - detection_range for c1, c2 in zip(s1, s2)]
+        high = [min(c1, c2) + detection_range for c1, c2 in zip(s1, s2)]
+        while (
+            sum(
+                all(abs(a - b) <= detection_range for a, b in zip(p, s1))
+                and all(abs(a - b) <= detection_range for a, b in zip(p, s2))
+                for p in beacons
+            )
+            < nb_common
+        ):
+            beacons.add(random_point(low, high))
+    for s in scanners:
+        for _ in range(rng.randint(5, 15)):
+            beacons.add(
+                random_point(
+                    [c - detection_range for c in s], [c + detection_range for c in s]
+                )
+            )
+    lines = []
+    for i, s in enumerate(scanners):
+        if i:
+            lines.append("")
+        lines.append("--- scanner %d ---" % i)
+        rotation = rotations[0] if i == 0 else rng.choice(rotations)
+        seen = [
+            rotation(tuple(a - b for a, b in zip(p, s)))
+            for p in beacons
+            if all(abs(a - b) <= detection_range for a, b in zip(p, s))
+        ]
+        rng.shuffle(seen)
+        lines.extend("%d,%d,%d" % p for p in seen)
+    return lines_to_str(lines)
+
+
+# Day 20: side of the (square) input image
+def generate_day20(size, rng):
+    # Like the actual input, the enhancement algorithm lights up the infinite
+    # dark area (first character is "#") and switches it off on the next step
+    algo = ["#"] + [rng.choice(".#") for _ in range(510)] + ["."]
+    return lines_to_str(
+        ["".join(algo), ""]
+        + ["".join(rng.choice(".#") for _ in range(size)) for _ in range(size)]
+    )
+
+
+# Day 21: starting positions - the game does not scale, size is ignored
+def generate_day21(size, rng):
+    return lines_to_str(
+        "Player %d starting position: %d" % (i, rng.randint(1, 10)) for i in (1, 2)
+    )
+
+
+# Day 22: number of reboot steps
+def generate_day22(size, rng):
+    # Like the actual input, the first steps are in the initialization
+    # region, the other ones are much bigger and far away from it
+    lines = []
+    for i in range(size):
+        if i < max(1, size // 20):
+            center, half_size = 30, 25
+        else:
+            center, half_size = 100000, 20000
+        ranges = []
+        for axis in "xyz":
+            begin = rng.randint(-center, center - half_size)
+            ranges.append(
+                "%s=%d..%d" % (axis, begin, begin + rng.randint(1, half_size))
+            )
+        action = "on" if i < 2 or rng.random() < 0.6 else "off"
+        lines.append("%s %s" % (action, ",".join(ranges)))
+    return lines_to_str(lines)
+
+
+# Day 23: amphipod arrangement - burrow size is fixed, size is ignored
+def generate_day23(size, rng):
+    amphipods = list("AABBCCDD")
+    rng.shuffle(amphipods)
+    return lines_to_str(
+        [
+            "#############",
+            "#...........#",
+            "###%s#%s#%s#%s###" % tuple(amphipods[:4]),
+            "  #%s#%s#%s#%s#" % tuple(amphipods[4:]),
+            "  #########",
+        ]
+    )
+
+
+# Day 24: number of digits of the model number (one block of instructions each)
+MONAD_BLOCK = [
+    "inp w",
+    "mul x 0",
+    "add x z",
+    "mod x 26",
+    "div z %d",
+    "add x %d",
+    "eql x w",
+    "eql x 0",
+    "mul y 0",
+    "add y 25",
+    "mul y x",
+    "add y 1",
+    "mul z y",
+    "mul y 0",
+    "add y w",
+    "add y %d",
+    "mul y x",
+    "add z y",
+]
+
+# monad_analysis checks properties of the first blocks of the actual input
+MONAD_FIRST_BLOCKS = [(1, 13, 8), (1, 12, 13), (1, 12, 8), (1, 10, 10)]
+
+
+def generate_day24(size, rng):
+    params = MONAD_FIRST_BLOCKS[:size]
+    depth = len(params)
+    for i in range(len(params), size):
+        # Push a digit or pop one, balanced like the actual input
+        if depth and (rng.random() < 0.5 or depth >= size - i):
+            params.append((26, rng.randint(-16, 0), rng.randint(1, 16)))
+            depth -= 1
+        else:
+            params.append((1, rng.randint(10, 16), rng.randint(1, 16)))
+            depth += 1
+    lines = []
+    for div, add_x, add_y in params:
+        block = list(MONAD_BLOCK)
+        block[4] %= div
+        block[5] %= add_x
+        block[15] %= add_y
+        lines.extend(block)
+    return lines_to_str(lines)
+
+
+# Day 25: side of the (square) sea floor
+def generate_day25(size, rng):
+    # Same density as the actual input, so that the herds end up blocked
+    return lines_to_str(
+        "".join(rng.choices(".>v", (2, 1, 1))[0] for _ in range(size))
+        for _ in range(size)
+    )
+
+
+# Default sizes for the scaling benchmark (geometric progressions)
+default_sizes = {
+    1: [1000, 10000, 100000, 1000000],
+    2: [1000, 10000, 100000, 1000000],
+    3: [1000, 10000, 100000],
+    4: [10, 100, 1000, 10000],
+    5: [100, 500, 2000, 8000],
+    6: [10, 30, 100, 300],
+    7: [100, 1000, 10000],
+    8: [10, 100, 1000],
+    9: [20, 50, 100, 200],
+    10: [10, 100, 1000, 10000],
+    11: [10, 20, 40, 80],
+    12: [4, 8, 12, 16],
+    13: [100, 1000, 10000],
+    14: [10, 100, 1000],
+    15: [10, 20, 50, 100],
+    16: [10, 100, 1000, 10000],
+    17: [10, 20, 40, 80],
+    18: [10, 25, 50, 100],
+    19: [2, 4, 8, 16],
+    20: [10, 25, 50, 100],
+    21: [1],
+    22: [20, 50, 100, 200],
+    23: [1],
+    24: [14],
+    25: [20, 50, 100, 150],
+}
+
+generators = {
+    day_num: globals()["generate_day%d" % day_num] for day_num in default_sizes
+}
+
+
+def generate(day_num, size, seed=0):
+    return generators[day_num](size, random.Random("%d-%d-%d" % (day_num, size, seed)))
+
+
+def get_args():
+    parser = argparse.ArgumentParser(description="Generate a synthetic input file")
+    parser.add_argument("day", type=int, choices=sorted(generators))
+    parser.add_argument("size", type=int)
+    parser.add_argument("-s", "--seed", type=int, default=0)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = get_args()
+    sys.stdout.write(generate(args.day, args.size, args.seed))
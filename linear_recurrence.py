@@ -0,0 +1,73 @@
+# vi: set shiftwidth=4 tabstop=4 expandtab:
+import collections
+import operator
+
+# Populations where each individual of a given state turns into a fixed
+# number of individuals of other states at each step: with the counts as a
+# column vector v, a step is v' = M v where M[i][j] is the number of
+# individuals of state i coming from one individual of state j.
+
+
+def build_matrix(initial_states, transitions):
+    # transitions(state) yields (state2, count) pairs, states reachable from
+    # the initial ones are discovered on the way
+    # Returns (index of each state, matrix)
+    index = dict()
+    queue = collections.deque()
+    for state in initial_states:
+        if state not in index:
+            index[state] = len(index)
+            queue.append(state)
+    columns = dict()
+    while queue:
+        state = queue.popleft()
+        column = collections.Counter()
+        for state2, count in transitions(state):
+            if state2 not in index:
+                index[state2] = len(index)
+                queue.append(state2)
+            column[state2] += count
+        columns[state] = column
+    matrix = [[0] * len(index) for _ in index]
+    for state, column in columns.items():
+        for state2, count in column.items():
+            matrix[index[state2]][index[state]] = count
+    return index, matrix
+
+
+def get_vector(index, counts):
+    vector = [0] * len(index)
+    for state, count in counts.items():
+        vector[index[state]] += count
+    return vector
+
+
+def multiply(a, b):
+    columns = list(zip(*b))
+    return [[sum(map(operator.mul, row, col)) for col in columns] for row in a]
+
+
+def apply(matrix, vector):
+    return [sum(map(operator.mul, row, vector)) for row in matrix]
+
+
+def advance(matrix, vector, steps, method=None):
+    # Squaring costs about 2 log2(steps) products of n x n matrices, against
+    # steps matrix-vector products one step at a time
+    n = len(vector)
+    if method is None:
+        method = "squaring" if steps > 2 * n * steps.bit_length() else "stepping"
+    if method == "stepping":
+        for _ in range(steps):
+            vector = apply(matrix, vector)
+        return vector
+    assert method == "squaring"
+    # Powers of the same matrix commute: the bits of steps can be applied in
+    # any order
+    while steps:
+        if steps & 1:
+            vector = apply(matrix, vector)
+        steps >>= 1
+        if steps:
+            matrix = multiply(matrix, matrix)
+    return vector
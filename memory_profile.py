@@ -0,0 +1,127 @@
+# vi: set shiftwidth=4 tabstop=4 expandtab:
+import collections
+import contextlib
+import inspect
+import io
+import json
+import linecache
+import threading
+import tracemalloc
+import _weakrefset
+
+import benchmark
+
+ignored_files = [
+    tracemalloc.__file__,
+    linecache.__file__,
+    threading.__file__,
+    _weakrefset.__file__,
+    __file__,
+]
+
+
+def get_allocation_sites(snapshot_before, snapshot_after, nb_sites):
+    filters = [tracemalloc.Filter(False, f) for f in ignored_files]
+    snapshot_before = snapshot_before.filter_traces(filters)
+    snapshot_after = snapshot_after.filter_traces(filters)
+    stats = snapshot_after.compare_to(snapshot_before, "lineno")
+    stats = sorted(stats, key=lambda s: s.size_diff, reverse=True)
+    return [
+        {
+            "site": "%s:%d" % (s.traceback[0].filename, s.traceback[0].lineno),
+            "size": s.size_diff,
+            "count": s.count_diff,
+        }
+        for s in stats[:nb_sites]
+        if s.size_diff > 0
+    ]
+
+
+class PeakSampler(threading.Thread):
+    # Snapshots cannot be taken exactly at the peak: memory in use is polled
+    # and a snapshot is taken whenever it grows significantly past the
+    # largest value seen so far
+    def __init__(self, interval=0.01, growth=1.05):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.growth = growth
+        self.snapshot = None
+        self.snapshot_size = 0
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            current, _ = tracemalloc.get_traced_memory()
+            if current > self.snapshot_size * self.growth:
+                self.snapshot = tracemalloc.take_snapshot()
+                self.snapshot_size = current
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+
+def profile_call(func, args=(), kwargs=None, nb_sites=5):
+    # Peak is relative to the memory in use before the call, net allocations
+    # correspond to what is still in use after the call (return value included)
+    kwargs = kwargs or dict()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        current_before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        sampler = PeakSampler()
+        sampler.snapshot_size = current_before
+        sampler.start()
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                ret = func(*args, **kwargs)
+                if inspect.isgenerator(ret):
+                    ret = list(ret)
+        finally:
+            sampler.stop()
+        current_after, peak = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    at_peak = sampler.snapshot if sampler.snapshot_size > current_after else after
+    return {
+        "peak": peak - current_before,
+        "net": current_after - current_before,
+        "peak_sites": get_allocation_sites(before, at_peak, nb_sites),
+        "net_sites": get_allocation_sites(before, after, nb_sites),
+    }
+
+
+def profile_day(day_num, nb_sites=5):
+    # Whole get_solutions() first, then each of the solver functions it calls
+    module = __import__("day%d" % day_num)
+    report = collections.OrderedDict()
+    report[module.__name__] = profile_call(module.get_solutions, nb_sites=nb_sites)
+    for call in benchmark.get_solver_calls(module):
+        args, kwargs = benchmark.get_arguments(call)
+        report[call.name] = profile_call(call.func, args, kwargs, nb_sites)
+    return report
+
+
+def format_size(size):
+    return "%.1f" % (size / 1024)
+
+
+def print_report(report, nb_sites=5):
+    print("%-40s %12s %12s" % ("Day / function", "peak (KiB)", "net (KiB)"))
+    for name, info in report.items():
+        print(
+            "%-40s %12s %12s"
+            % (name, format_size(info["peak"]), format_size(info["net"]))
+        )
+        for site in info["peak_sites"][:nb_sites]:
+            print(
+                "    %10s KiB %8d blocks  %s"
+                % (format_size(site["size"]), site["count"], site["site"])
+            )
+
+
+def write_report(report, file_path):
+    with open(file_path, "w") as f:
+        json.dump(report, f, indent=4)
@@ -0,0 +1,178 @@
+# vi: set shiftwidth=4 tabstop=4 expandtab:
+import collections
+import functools
+import hashlib
+import inspect
+import os
+import importlib
+import importlib.util
+import pickle
+import sys
+import tempfile
+
+import solution_cache
+
+# Disabled by default: enabled with AOC_PARSE_CACHE=1 or with enable()
+enabled = os.environ.get("AOC_PARSE_CACHE", "0") != "0"
+cache_dir = os.environ.get("AOC_PARSE_CACHE_DIR", ".parse_cache")
+max_size = int(os.environ.get("AOC_PARSE_CACHE_MAX_SIZE", 64 * 1024 * 1024))
+
+stats = collections.Counter()  # "hit", "miss", "evicted"
+
+
+def enable(enable=True):
+    # Environment is updated as well so that child processes inherit the setting
+    global enabled
+    enabled = enable
+    os.environ["AOC_PARSE_CACHE"] = "1" if enable else "0"
+
+
+def get_file_hash(file_path):
+    h = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def get_source_hash(func):
+    # Whole source of the parser's module (functions and constants it may rely
+    # on) and of the local modules it imports (grid.Grid objects for instance)
+    module = sys.modules[func.__module__]
+    paths = {inspect.getsourcefile(module)}
+    paths.update(path for _, path in solution_cache.get_local_modules(module))
+    h = hashlib.sha256()
+    for path in sorted(paths):
+        with open(path, "rb") as f:
+            h.update(f.read())
+    return h.hexdigest()
+
+
+def get_cache_files():
+    try:
+        entries = list(os.scandir(cache_dir))
+    except FileNotFoundError:
+        return []
+    return [e for e in entries if e.is_file() and e.name.endswith(".pickle")]
+
+
+def evict(keep):
+    # Least recently used entries are removed first (hits refresh the mtime)
+    entries = sorted(get_cache_files(), key=lambda e: e.stat().st_mtime)
+    total = sum(e.stat().st_size for e in entries)
+    for e in entries:
+        if total <= max_size:
+            break
+        if e.path != keep:
+            total -= e.stat().st_size
+            os.remove(e.path)
+            stats["evicted"] += 1
+
+
+def load(path):
+    try:
+        with open(path, "rb") as f:
+            value = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError):
+        return False, None
+    os.utime(path)
+    return True, value
+
+
+def store(path, value):
+    os.makedirs(cache_dir, exist_ok=True)
+    # Written to a temporary file first: days may run in parallel
+    tmp_path = "%s.%d.tmp" % (path, os.getpid())
+    with open(tmp_path, "wb") as f:
+        pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+    evict(keep=path)
+
+
+def cached_parser(func):
+    # Decorator for get_xxx_from_file(file_path) functions: the parsed value is
+    # stored on disk, keyed by the hashes of the input file and of the parser
+    signature = inspect.signature(func)
+    source_hash = None
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        nonlocal source_hash
+        if not enabled:
+            return func(*args, **kwargs)
+        if source_hash is None:
+            source_hash = get_source_hash(func)
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        key = hashlib.sha256()
+        key.update(func.__qualname__.encode())
+        key.update(source_hash.encode())
+        key.update(get_file_hash(bound.arguments["file_path"]).encode())
+        key.update(repr(sorted(bound.arguments.items())).encode())
+        path = os.path.join(
+            cache_dir, "%s.%s.pickle" % (func.__module__, key.hexdigest())
+        )
+        found, value = load(path)
+        if found:
+            stats["hit"] += 1
+            return value
+        stats["miss"] += 1
+        value = func(*args, **kwargs)
+        store(path, value)
+        return value
+
+    return wrapper
+
+
+def import_from_source(name, path):
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def run_tests():
+    # Changing a constant used by a parser invalidates its cached values
+    # (the state of the imported module is the one used by parsers, even when
+    # this file is run as a script)
+    module = importlib.import_module(__name__.replace("__main__", "parse_cache"))
+    source = """import parse_cache
+
+CHARS = %r
+
+
+@parse_cache.cached_parser
+def get_chars_from_file(file_path):
+    with open(file_path) as f:
+        return [CHARS.index(c) for c in f.read().strip()]
+"""
+    saved = module.enabled, module.cache_dir, module.stats.copy()
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            module.enabled = True
+            module.cache_dir = os.path.join(tmp_dir, "cache")
+            input_path = os.path.join(tmp_dir, "input.txt")
+            with open(input_path, "w") as f:
+                f.write("ab")
+            test_path = os.path.join(tmp_dir, "parse_cache_test.py")
+            for chars, value, stat in [
+                ("ab", [0, 1], "miss"),
+                ("ab", [0, 1], "hit"),
+                ("ba", [1, 0], "miss"),
+            ]:
+                with open(test_path, "w") as f:
+                    f.write(source % chars)
+                test_module = import_from_source("parse_cache_test", test_path)
+                module.stats.clear()
+                assert test_module.get_chars_from_file(input_path) == value
+                assert module.stats[stat] == 1
+    finally:
+        sys.modules.pop("parse_cache_test", None)
+        module.enabled, module.cache_dir, stats = saved
+        module.stats.clear()
+        module.stats.update(stats)
+
+
+if __name__ == "__main__":
+    run_tests()
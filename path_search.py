@@ -0,0 +1,109 @@
+# vi: set shiftwidth=4 tabstop=4 expandtab:
+import collections
+import heapq
+import itertools
+
+# Searches work over implicit graphs: neighbours(node) yields the neighbours
+# of a node (as (node, weight) pairs for weighted searches) and nodes only
+# need to be hashable. They stop as soon as a node for which is_goal(node)
+# is true is settled and return (goal or None, distances of the settled
+# nodes).
+
+stats = collections.Counter()  # "expanded", "pushed"
+
+
+def bfs(start, neighbours, is_goal=None):
+    distances = {start: 0}
+    queue = collections.deque([start])
+    stats["pushed"] += 1
+    while queue:
+        node = queue.popleft()
+        if is_goal is not None and is_goal(node):
+            return node, distances
+        stats["expanded"] += 1
+        d = distances[node] + 1
+        for node2 in neighbours(node):
+            if node2 not in distances:
+                distances[node2] = d
+                queue.append(node2)
+                stats["pushed"] += 1
+    return None, distances
+
+
+def dijkstra(start, neighbours, is_goal=None):
+    # Ties are broken by insertion order so that nodes are never compared
+    distances = dict()
+    tie_breaker = itertools.count()
+    heap = [(0, next(tie_breaker), start)]
+    stats["pushed"] += 1
+    while heap:
+        d, _, node = heapq.heappop(heap)
+        if node in distances:
+            continue
+        distances[node] = d
+        if is_goal is not None and is_goal(node):
+            return node, distances
+        stats["expanded"] += 1
+        for node2, weight in neighbours(node):
+            if node2 not in distances:
+                heapq.heappush(heap, (d + weight, next(tie_breaker), node2))
+                stats["pushed"] += 1
+    return None, distances
+
+
+def dial(start, neighbours, is_goal=None, max_weight=9):
+    # Dijkstra with a circular array of buckets, for integer weights between
+    # 0 and max_weight: pending distances all fit in max_weight + 1 buckets
+    nb_buckets = max_weight + 1
+    buckets = [[] for _ in range(nb_buckets)]
+    buckets[0].append(start)
+    stats["pushed"] += 1
+    pending = 1
+    distances = dict()
+    d = 0
+    while pending:
+        bucket = buckets[d % nb_buckets]
+        while bucket:
+            node = bucket.pop()
+            pending -= 1
+            if node in distances:
+                continue
+            distances[node] = d
+            if is_goal is not None and is_goal(node):
+                return node, distances
+            stats["expanded"] += 1
+            for node2, weight in neighbours(node):
+                if node2 not in distances:
+                    assert 0 <= weight <= max_weight
+                    buckets[(d + weight) % nb_buckets].append(node2)
+                    pending += 1
+                    stats["pushed"] += 1
+        d += 1
+    return None, distances
+
+
+def a_star(start, neighbours, heuristic, is_goal):
+    # heuristic(node) must not overestimate the distance to the closest goal;
+    # nodes are reopened when a shorter path is found so that it does not
+    # need to be consistent
+    distances = {start: 0}
+    closed = dict()
+    tie_breaker = itertools.count()
+    heap = [(heuristic(start), next(tie_breaker), start)]
+    stats["pushed"] += 1
+    while heap:
+        _, _, node = heapq.heappop(heap)
+        d = distances[node]
+        if closed.get(node, d + 1) <= d:
+            continue
+        closed[node] = d
+        if is_goal(node):
+            return node, closed
+        stats["expanded"] += 1
+        for node2, weight in neighbours(node):
+            d2 = d + weight
+            if d2 < distances.get(node2, d2 + 1):
+                distances[node2] = d2
+                heapq.heappush(heap, (d2 + heuristic(node2), next(tie_breaker), node2))
+                stats["pushed"] += 1
+    return None, closed
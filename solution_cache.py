@@ -0,0 +1,81 @@
+# vi: set shiftwidth=4 tabstop=4 expandtab:
+import contextlib
+import glob
+import hashlib
+import io
+import json
+import os
+import sys
+
+cache_dir = os.environ.get("AOC_SOLUTION_CACHE_DIR", ".solution_cache")
+
+repo_dir = os.path.dirname(os.path.abspath(__file__))
+
+
+def get_local_modules(module):
+    # The day module and the modules from this repository it depends on
+    to_visit, seen = [module], dict()
+    while to_visit:
+        m = to_visit.pop()
+        path = getattr(m, "__file__", None)
+        if m.__name__ in seen or path is None:
+            continue
+        if os.path.dirname(os.path.abspath(path)) != repo_dir:
+            continue
+        seen[m.__name__] = path
+        to_visit.extend(v for v in vars(m).values() if type(v) is type(sys))
+    return sorted(seen.items())
+
+
+def get_input_files(module):
+    return sorted(glob.glob(os.path.join(repo_dir, "%s_*.txt" % module.__name__)))
+
+
+def get_key(module):
+    h = hashlib.sha256()
+    for name, path in get_local_modules(module):
+        h.update(name.encode())
+        with open(path, "rb") as f:
+            h.update(f.read())
+    for path in get_input_files(module):
+        h.update(os.path.basename(path).encode())
+        with open(path, "rb") as f:
+            h.update(f.read())
+    return h.hexdigest()
+
+
+def get_cache_path(module):
+    return os.path.join(cache_dir, "%s.json" % module.__name__)
+
+
+def load(module, key):
+    try:
+        with open(get_cache_path(module)) as f:
+            entry = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return entry["output"] if entry.get("key") == key else None
+
+
+def store(module, key, output):
+    os.makedirs(cache_dir, exist_ok=True)
+    path = get_cache_path(module)
+    tmp_path = "%s.%d.tmp" % (path, os.getpid())
+    with open(tmp_path, "w") as f:
+        json.dump({"key": key, "output": output}, f)
+    os.replace(tmp_path, path)
+
+
+def get_solutions(module, force=False):
+    # Replay the output of module.get_solutions() if neither the code nor the
+    # input changed since it was stored; returns whether the cache was used
+    key = get_key(module)
+    output = None if force else load(module, key)
+    from_cache = output is not None
+    if not from_cache:
+        with contextlib.redirect_stdout(io.StringIO()) as f:
+            module.get_solutions()
+        output = f.getvalue()
+        store(module, key, output)
+    sys.stdout.write(output)
+    return from_cache